@@ -1,25 +1,43 @@
 from datetime import datetime
+import argparse
 import os
 from datasets import load_dataset
 import subprocess
 import pandas as pd
 import json
 
+from sharding import parse_shard
+
+parser = argparse.ArgumentParser(description="Run the GSM8k questions with every model and implementation")
+parser.add_argument(
+    "--shard",
+    help="Run only shard i of N (e.g. 2/4) of the questions",
+    default=None,
+    type=parse_shard,
+)
+parser.add_argument(
+    "--merge",
+    help="Combine the ModelSweep-*-shard*.csv files of a sharded sweep into one file instead of running",
+    default=None,
+    nargs="+",
+)
+args = parser.parse_args()
+
 models = ["gpt-3.5-turbo", "gpt-4", "gpt-4o"]
 timestamp = datetime.now().strftime("%Y-%m-%d-%H%M%S")
 filename = f"ModelSweep-{timestamp}.csv"
+if args.shard:
+    filename = f"ModelSweep-{timestamp}-shard{args.shard[0]}of{args.shard[1]}.csv"
 
 def codeRun(cmd: list[str], input: str, modelName: str):
     subEnv = os.environ.copy()
     subEnv["MODEL_NAME"] = modelName
     print(modelName)
-    with open("/tmp/STDIN.txt", "w") as inputFile:
-        inputFile.write(input)
-    with open("/tmp/STDIN.txt", "r") as inputFile:
-        start = datetime.now()
-        res = subprocess.check_output(cmd, stdin=inputFile, env=subEnv).decode()
-        duration = datetime.now() - start
-        return res, duration.total_seconds()
+    # Passed straight to stdin: a shared temp file would let parallel shards overwrite each other's question
+    start = datetime.now()
+    res = subprocess.check_output(cmd, input=input.encode(), env=subEnv).decode()
+    duration = datetime.now() - start
+    return res, duration.total_seconds()
 
 
 def save(res):
@@ -40,6 +58,20 @@ def save(res):
     df.to_csv(filename)
 
 
+def merge(shard_files):
+    df = pd.concat([pd.read_csv(path, index_col=0) for path in shard_files], ignore_index=True)
+    # A shard that was rerun shows up twice; keep the row from the file listed last
+    df = df.drop_duplicates(subset=["QuestionID", "Model", "Program"], keep="last")
+    df = df.sort_values(["QuestionID", "Model", "Program"]).reset_index(drop=True)
+    output = f"ModelSweep-{timestamp}.csv"
+    df.to_csv(output)
+    print(f"Merged {len(shard_files)} files into {output}: {df['QuestionID'].nunique()} questions, {len(df)} rows")
+    print(df.groupby(["Model", "Program"])["ExactMatch"].mean().mul(100).round(1).to_string())
+
+
+if args.merge:
+    merge(args.merge)
+    exit(0)
 
 ds = load_dataset("openai/gsm8k", "main", split="train")
 train = ds.iter(batch_size=1)
@@ -48,6 +80,9 @@ count = 0
 for i in train:
     if count == 30:
         exit(0)
+    if args.shard and count % args.shard[1] != args.shard[0] - 1:
+        count += 1
+        continue
     question = i["question"][0]
     answer_str: str = i["answer"][0]
     answer = answer_str.split(" ")[-1].replace(",", "")
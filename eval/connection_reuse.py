@@ -0,0 +1,123 @@
+"""Measure HTTP connection reuse and memory as the number of Jac modules grows.
+
+Every benchmark module declares its own ``glob llm = OpenAI(...)``. This script
+generates programs that import K such modules, runs each against the stub
+server and reports how many TCP connections the sequential ``by llm()`` calls
+opened and the peak RSS of the process. Fully pooled backends open one
+connection regardless of K. Flat memory means the per-module cost stays
+constant.
+"""
+
+import argparse
+import csv
+import logging
+import os
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+from llm_stub_server import LLMStubServer, client_env
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+MODULE_TEMPLATE = """import from mtllm.llms {OpenAI}
+
+glob llm = OpenAI(model_name="gpt-4o");
+
+def ask(question: str) -> str by llm();
+"""
+
+
+def write_program(folder, num_modules, calls_per_module):
+    """Write ``num_modules`` LLM modules and a ``main.jac`` calling each of them in turn."""
+    lines = []
+    for i in range(num_modules):
+        with open(os.path.join(folder, f"llm_module_{i}.jac"), "w") as f:
+            f.write(MODULE_TEMPLATE)
+        lines.append(f"import llm_module_{i};")
+    lines.append("")
+    lines.append("with entry {")
+    lines.append(f"    for _ in range({calls_per_module}) {{")
+    for i in range(num_modules):
+        lines.append(f'        llm_module_{i}.ask("ping");')
+    lines.append("    }")
+    lines.append("}")
+    main_path = os.path.join(folder, "main.jac")
+    with open(main_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return main_path
+
+
+def run_with_rusage(cmd, env, timeout=300):
+    """Run ``cmd`` and return ``(return_code, stderr, max_rss_kb, seconds)``.
+
+    A process still running after ``timeout`` seconds is killed and reported as
+    failed (return code -1), like a timeout in overall_accuracy.py.
+    """
+    with tempfile.TemporaryFile(mode="w+") as stderr:
+        start_time = time.time()
+        process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=stderr, env=env)
+        while True:
+            pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                break
+            if time.time() - start_time > timeout:
+                process.kill()
+                _, status, rusage = os.wait4(process.pid, 0)
+                process.returncode = os.waitstatus_to_exitcode(status)
+                return -1, f"Execution timeout ({timeout} seconds)", rusage.ru_maxrss, timeout
+            time.sleep(0.005)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        execution_time = time.time() - start_time
+        stderr.seek(0)
+        return process.returncode, stderr.read(), rusage.ru_maxrss, execution_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure connection reuse and memory across many LLM modules")
+    parser.add_argument(
+        "--modules",
+        help="Comma separated module counts to try",
+        default="1,2,4,8,16,32",
+        type=str,
+    )
+    parser.add_argument("--calls", help="Calls per module", default=3, type=int)
+    args = parser.parse_args()
+
+    server = LLMStubServer(default_response='[Output] "pong"').start()
+    rows = []
+    try:
+        for num_modules in [int(n) for n in args.modules.split(",")]:
+            with tempfile.TemporaryDirectory() as folder:
+                main_path = write_program(folder, num_modules, args.calls)
+                return_code, stderr, max_rss, execution_time = run_with_rusage(
+                    ["jac", "run", main_path], client_env(server.base_url)
+                )
+            requests = server.drain()
+            connections = len({r["connection"] for r in requests})
+            rows.append({
+                "modules": num_modules,
+                "success": return_code == 0,
+                "requests": len(requests),
+                "connections": connections,
+                "requests_per_connection": len(requests) / connections if connections else 0,
+                "max_rss_kb": max_rss,
+                "execution_time": execution_time,
+            })
+            if return_code != 0:
+                logging.warning(f"{num_modules} modules failed: {stderr.strip().splitlines()[-1:]}")
+            logging.info(
+                f"{num_modules} modules: {len(requests)} requests over {connections} connections, "
+                f"max RSS {max_rss / 1024:.1f} MB, {execution_time:.2f}s"
+            )
+    finally:
+        server.stop()
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_csv = f"connection_reuse_results_{timestamp}.csv"
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    logging.info(f"Results saved to: {output_csv}")
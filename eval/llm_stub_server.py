@@ -0,0 +1,639 @@
+"""Local OpenAI-compatible stand-in server for offline benchmark runs.
+
+Benchmark programs are pointed at it through ``OPENAI_BASE_URL`` (see
+``client_env``) and receive canned completions chosen by regex rules, so the
+framework-side cost of a ``by llm()`` call can be measured without network or
+provider variance.
+
+With ``upstream`` set it acts as a recording proxy instead: requests are
+relayed to the real API and every call is traced (model, bytes, tokens from
+the provider's usage data, network time, and for streamed calls the time to
+first token) without modifying the frameworks.
+"""
+
+import argparse
+import collections
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CACHE_MIN_TOKENS = 1024
+CACHE_INCREMENT_TOKENS = 128
+PROMPT_HISTORY = 64
+FORWARDED_HEADERS = ("authorization", "content-type", "openai-organization", "openai-project")
+
+
+def load_rules(path):
+    """Load ``[{"name": ..., "match": <regex>, "response": <text>}]`` rules from JSON.
+
+    ``response`` may also be a list, in which case successive matches cycle
+    through it (e.g. an invalid output followed by the corrected one).
+    """
+    with open(path) as f:
+        return [
+            (rule.get("name", rule["match"]), re.compile(rule["match"], re.DOTALL), rule["response"])
+            for rule in json.load(f)
+        ]
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token), used for stub usage data."""
+    return max(1, len(text) // 4)
+
+
+def shared_prefix_length(prompt, previous_prompts):
+    """Length of the longest prefix ``prompt`` shares with any earlier prompt."""
+    longest = 0
+    for previous in previous_prompts:
+        low, high = longest, min(len(prompt), len(previous))
+        if prompt[:low] != previous[:low]:
+            continue
+        while low < high:
+            mid = (low + high + 1) // 2
+            if prompt[:mid] == previous[:mid]:
+                low = mid
+            else:
+                high = mid - 1
+        longest = low
+    return longest
+
+
+def cached_tokens(shared_tokens):
+    """Apply the OpenAI prompt caching rule: 1024-token minimum, then 128-token increments."""
+    if shared_tokens < CACHE_MIN_TOKENS:
+        return 0
+    return shared_tokens // CACHE_INCREMENT_TOKENS * CACHE_INCREMENT_TOKENS
+
+
+def apply_limits(content, request):
+    """Apply the request's ``stop`` sequences and token budget to ``content``.
+
+    Returns ``(content, finish_reason)`` with ``finish_reason`` set to
+    ``"length"`` when the budget cut the output short, as OpenAI does.
+    """
+    stop = request.get("stop") or []
+    for sequence in [stop] if isinstance(stop, str) else stop:
+        if sequence in content:
+            content = content[:content.index(sequence)]
+    max_tokens = request.get("max_completion_tokens") or request.get("max_tokens")
+    if max_tokens and estimate_tokens(content) > max_tokens:
+        return content[:max_tokens * 4], "length"
+    return content, "stop"
+
+
+def message_text(content):
+    """Flatten a chat message content field (string or list of parts) into text."""
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def client_env(base_url, env=None):
+    """Return a copy of ``env`` that points OpenAI clients (openai SDK, litellm) at ``base_url``."""
+    env = dict(os.environ if env is None else env)
+    env["OPENAI_BASE_URL"] = base_url
+    env["OPENAI_API_BASE"] = base_url
+    env.setdefault("OPENAI_API_KEY", "stub-key")
+    return env
+
+
+def program_file(benchmark, implementation, folder=None):
+    """Path of ``<benchmark>_<implementation>.jac`` (``.py`` for dspy and lmql).
+
+    The file sits in ``folder``, or in ``../benchmarks/<benchmark>`` by default.
+    """
+    extension = "jac" if implementation == "mtllm" else "py"
+    return f"{folder or f'../benchmarks/{benchmark}'}/{benchmark}_{implementation}.{extension}"
+
+
+def program_command(file_path):
+    """Return the command that runs a benchmark program: ``jac run`` for Jac files, ``python`` otherwise."""
+    if file_path.endswith(".jac"):
+        return ["jac", "run", file_path]
+    return ["python", file_path]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.connection_id = self.server.open_connection()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        if path.endswith("/stats"):
+            self.send_json(200, self.server.stats())
+        elif path.endswith("/models"):
+            self.send_json(200, {"object": "list", "data": []})
+        else:
+            self.send_json(404, {"error": {"message": f"Unknown path: {self.path}"}})
+
+    def do_POST(self):
+        received = time.perf_counter()
+        received_at = time.time()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.server.upstream:
+            self.forward(body, received, received_at)
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json(404, {"error": {"message": f"Unknown path: {self.path}"}})
+            return
+
+        if self.server.throttled():
+            self.send_json(429, {"error": {
+                "message": "Rate limit reached (stub server)",
+                "type": "requests",
+                "code": "rate_limit_exceeded",
+            }}, {"Retry-After": "1"})
+            self.server.record({
+                "rule": None,
+                "received_at": received_at,
+                "status": 429,
+                "request_bytes": len(body),
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cached_tokens": 0,
+                "truncated": False,
+                "connection": self.connection_id,
+                "handle_time": time.perf_counter() - received,
+            })
+            return
+
+        request = json.loads(body or b"{}")
+        prompt = "\n".join(message_text(m.get("content")) for m in request.get("messages", []))
+        rule, content = self.server.respond(prompt)
+        content, finish_reason = apply_limits(content, request)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        shared_tokens = self.server.remember_prompt(prompt) // 4
+        completion_id = f"chatcmpl-stub-{self.server.request_count()}"
+        entry = {
+            "rule": rule,
+            "received_at": received_at,
+            "status": 200,
+            "model": request.get("model"),
+            "request_bytes": len(body),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "shared_prefix_tokens": shared_tokens,
+            "cached_tokens": cached_tokens(shared_tokens),
+            "max_tokens": request.get("max_completion_tokens") or request.get("max_tokens"),
+            "truncated": finish_reason == "length",
+            "streamed": bool(request.get("stream")),
+            "connection": self.connection_id,
+        }
+        if request.get("stream"):
+            entry.update(self.send_stream(completion_id, request.get("model", "stub"), content, finish_reason))
+        else:
+            self.send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason,
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                    "prompt_tokens_details": {"cached_tokens": cached_tokens(shared_tokens)},
+                },
+            })
+        entry["handle_time"] = time.perf_counter() - received
+        self.server.record(entry)
+
+    def forward(self, body, received, received_at):
+        """Relay the request to the upstream API and record what the call cost.
+
+        Streamed responses are relayed line by line as they arrive (see
+        ``relay_stream``), so the trace also has time to first token and the
+        mean gap between tokens. Their token counts come from the final
+        ``usage`` chunk; without one they are estimated from the text and the
+        entry is marked ``usage_estimated``. An unreachable upstream is
+        answered with HTTP 502 and recorded with its error.
+        """
+        path = self.path[len("/v1"):] if self.path.startswith("/v1") else self.path
+        headers = {k: v for k, v in self.headers.items() if k.lower() in FORWARDED_HEADERS}
+        upstream_request = urllib.request.Request(
+            self.server.upstream.rstrip("/") + path, data=body, headers=headers, method="POST"
+        )
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            request = {}
+        sent = time.perf_counter()
+        try:
+            response = urllib.request.urlopen(upstream_request, timeout=600)
+        except urllib.error.HTTPError as e:
+            response = e
+        except (urllib.error.URLError, OSError) as e:
+            # Unreachable upstream, DNS failure or timeout: answer like a gateway and keep the call in the trace
+            self.server.record({
+                "rule": None,
+                "received_at": received_at,
+                "path": path,
+                "status": 502,
+                "error": str(e),
+                "model": request.get("model"),
+                "request_bytes": len(body),
+                "response_bytes": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cached_tokens": 0,
+                "max_tokens": request.get("max_completion_tokens") or request.get("max_tokens"),
+                "truncated": False,
+                "streamed": bool(request.get("stream")),
+                "connection": self.connection_id,
+                "network_time": time.perf_counter() - sent,
+                "handle_time": time.perf_counter() - received,
+            })
+            self.send_json(502, {"error": {"message": f"Upstream request failed: {e}", "type": "upstream_error"}})
+            return
+        streaming = {}
+        with response:
+            status = response.status
+            content_type = response.headers.get("Content-Type", "application/json")
+            if content_type.startswith("text/event-stream"):
+                data, streaming = self.relay_stream(response, status, content_type, sent)
+            else:
+                data = response.read()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+        network_time = time.perf_counter() - sent
+
+        if streaming:
+            usage = streaming["usage"]
+            choices = [{"finish_reason": streaming["finish_reason"]}]
+        else:
+            try:
+                payload = json.loads(data)
+            except ValueError:
+                payload = {}
+            usage = payload.get("usage") or {}
+            choices = payload.get("choices") or [{}]
+        usage_estimated = bool(streaming) and not usage
+        if usage_estimated:
+            # No usage chunk (the client did not set stream_options.include_usage): estimate from the text
+            prompt = "\n".join(message_text(m.get("content")) for m in request.get("messages", []))
+            usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(streaming["content"])}
+        self.server.record({
+            "rule": None,
+            "received_at": received_at,
+            "path": path,
+            "status": status,
+            "model": request.get("model"),
+            "request_bytes": len(body),
+            "response_bytes": len(data),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "cached_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+            "max_tokens": request.get("max_completion_tokens") or request.get("max_tokens"),
+            "truncated": choices[0].get("finish_reason") == "length",
+            "streamed": bool(request.get("stream")),
+            "usage_estimated": usage_estimated,
+            "time_to_first_token": streaming.get("time_to_first_token"),
+            "mean_token_gap": streaming.get("mean_token_gap"),
+            "chunks": streaming.get("chunks"),
+            "aborted": streaming.get("aborted", False),
+            "connection": self.connection_id,
+            "network_time": network_time,
+            "handle_time": time.perf_counter() - received,
+        })
+
+    def relay_stream(self, response, status, content_type, sent):
+        """Pass an upstream server-sent event stream to the client line by line.
+
+        Returns the raw body and what the events carried: the streamed text,
+        the final finish reason, the ``usage`` chunk if the provider sent one,
+        and the timings measured from when the request was sent upstream (time
+        to the first chunk carrying content, mean gap between content chunks).
+        Relaying stops if the client hangs up.
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        lines = []
+        arrivals = []
+        content = []
+        usage = {}
+        finish_reason = None
+        aborted = False
+        for line in response:
+            lines.append(line)
+            if line.startswith(b"data:"):
+                try:
+                    event = json.loads(line[len(b"data:"):])
+                except ValueError:
+                    event = {}
+                pieces = [(choice.get("delta") or {}).get("content") for choice in event.get("choices") or []]
+                if any(pieces):
+                    arrivals.append(time.perf_counter())
+                    content.extend(piece for piece in pieces if piece)
+                for choice in event.get("choices") or []:
+                    finish_reason = choice.get("finish_reason") or finish_reason
+                usage = event.get("usage") or usage
+            try:
+                self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                aborted = True
+                self.close_connection = True
+                break
+        if not aborted:
+            self.wfile.write(b"0\r\n\r\n")
+        gaps = [later - earlier for earlier, later in zip(arrivals, arrivals[1:])]
+        return b"".join(lines), {
+            "content": "".join(content),
+            "usage": usage,
+            "finish_reason": finish_reason,
+            "time_to_first_token": arrivals[0] - sent if arrivals else None,
+            "mean_token_gap": sum(gaps) / len(gaps) if gaps else None,
+            "chunks": len(arrivals),
+            "aborted": aborted,
+        }
+
+    def send_stream(self, completion_id, model, content, finish_reason):
+        """Stream ``content`` as chat completion chunks, one estimated token at a time.
+
+        Returns how many chunks were sent and whether the client hung up before
+        the end, so early-aborting streaming parsers can be measured.
+        """
+        pieces = [content[i:i + 4] for i in range(0, len(content), 4)]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        sent = 0
+        try:
+            for piece in pieces:
+                if self.server.token_latency:
+                    time.sleep(self.server.token_latency)
+                self.write_event(self.chunk(completion_id, model, {"content": piece}, None))
+                sent += 1
+            self.write_event(self.chunk(completion_id, model, {}, finish_reason))
+            self.write_event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        return {"chunks_sent": sent, "chunks_total": len(pieces), "aborted": sent < len(pieces)}
+
+    @staticmethod
+    def chunk(completion_id, model, delta, finish_reason):
+        return json.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        })
+
+    def write_event(self, data):
+        event = f"data: {data}\n\n".encode()
+        self.wfile.write(f"{len(event):X}\r\n".encode() + event + b"\r\n")
+        self.wfile.flush()
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class LLMStubServer(ThreadingHTTPServer):
+    """Threaded stub server; use ``start()``/``stop()`` to run it in-process."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        rules=(),
+        default_response="[Output] None",
+        latency=0.0,
+        token_latency=0.0,
+        upstream=None,
+        trace=None,
+        throttle_rate=0.0,
+        rpm_limit=0,
+    ):
+        super().__init__((host, port), StubHandler)
+        self.rules = list(rules)
+        self.default_response = default_response
+        self.latency = latency
+        self.token_latency = token_latency
+        self.upstream = upstream
+        self.trace = trace
+        self.throttle_rate = throttle_rate
+        self.rpm_limit = rpm_limit
+        self._random = random.Random(0)
+        self._accepted = collections.deque()
+        self.requests = []
+        self.connections = 0
+        self.prompts = collections.deque(maxlen=PROMPT_HISTORY)
+        self._served = collections.Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def respond(self, prompt):
+        """Return ``(rule_name, response)`` for the first rule matching ``prompt``."""
+        for name, pattern, response in self.rules:
+            if pattern.search(prompt):
+                if isinstance(response, list):
+                    with self._lock:
+                        served = self._served[name]
+                        self._served[name] += 1
+                    response = response[served % len(response)]
+                return name, response
+        return None, self.default_response
+
+    def throttled(self):
+        """Decide whether to answer the current request with HTTP 429.
+
+        Requests are rejected at random with probability ``throttle_rate`` and
+        once more than ``rpm_limit`` were accepted in the last 60 seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            while self._accepted and now - self._accepted[0] > 60:
+                self._accepted.popleft()
+            if self.throttle_rate and self._random.random() < self.throttle_rate:
+                return True
+            if self.rpm_limit and len(self._accepted) >= self.rpm_limit:
+                return True
+            self._accepted.append(now)
+            return False
+
+    def remember_prompt(self, prompt):
+        """Record ``prompt`` and return how many leading characters an earlier prompt shared."""
+        with self._lock:
+            shared = shared_prefix_length(prompt, self.prompts)
+            self.prompts.append(prompt)
+        return shared
+
+    def open_connection(self):
+        """Count a newly accepted TCP connection and return its id."""
+        with self._lock:
+            self.connections += 1
+            return self.connections
+
+    def record(self, entry):
+        """Keep ``entry`` for ``drain()`` and export it to the trace file, if any."""
+        with self._lock:
+            self.requests.append(entry)
+            if self.trace:
+                self.trace.write(json.dumps({"time": time.time(), **entry}) + "\n")
+                self.trace.flush()
+
+    def request_count(self):
+        with self._lock:
+            return len(self.requests)
+
+    def drain(self):
+        """Return and clear the requests recorded so far, restarting response cycles.
+
+        The prompt history is cleared too, so prefix sharing is only measured
+        between the requests of one run.
+        """
+        with self._lock:
+            requests, self.requests = self.requests, []
+            self._served.clear()
+            self.prompts.clear()
+        return requests
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": len(self.requests),
+                "request_bytes": sum(r["request_bytes"] for r in self.requests),
+                "handle_time": sum(r["handle_time"] for r in self.requests),
+                "aborted_streams": sum(1 for r in self.requests if r.get("aborted")),
+                "cached_tokens": sum(r["cached_tokens"] for r in self.requests),
+                "truncated": sum(1 for r in self.requests if r["truncated"]),
+                "throttled": sum(1 for r in self.requests if r["status"] == 429),
+                "connections": self.connections,
+                "requests_per_connection": len(self.requests) / self.connections if self.connections else 0,
+            }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible stub server")
+    parser.add_argument("--host", help="Host to bind", default="127.0.0.1", type=str)
+    parser.add_argument("--port", help="Port to bind", default=8765, type=int)
+    parser.add_argument(
+        "--rules",
+        help="JSON file with response rules",
+        default=None,
+        type=str,
+    )
+    parser.add_argument(
+        "--default_response",
+        help="Response used when no rule matches",
+        default="[Output] None",
+        type=str,
+    )
+    parser.add_argument(
+        "--latency",
+        help="Artificial latency added to every completion, in seconds",
+        default=0.0,
+        type=float,
+    )
+    parser.add_argument(
+        "--token_latency",
+        help="Delay between streamed chunks, in seconds",
+        default=0.0,
+        type=float,
+    )
+    parser.add_argument(
+        "--upstream",
+        help="Relay requests to this API base URL instead of answering from rules",
+        default=None,
+        type=str,
+    )
+    parser.add_argument(
+        "--trace",
+        help="Write one JSON line per call to this file ('-' for stdout)",
+        default=None,
+        type=str,
+    )
+    parser.add_argument(
+        "--throttle_rate",
+        help="Probability of answering a request with HTTP 429",
+        default=0.0,
+        type=float,
+    )
+    parser.add_argument(
+        "--rpm_limit",
+        help="Answer with HTTP 429 once this many requests were accepted in the last minute",
+        default=0,
+        type=int,
+    )
+    args = parser.parse_args()
+
+    if args.trace == "-":
+        trace = sys.stdout
+    elif args.trace:
+        trace = open(args.trace, "a")
+    else:
+        trace = None
+
+    server = LLMStubServer(
+        args.host,
+        args.port,
+        rules=load_rules(args.rules) if args.rules else (),
+        default_response=args.default_response,
+        latency=args.latency,
+        token_latency=args.token_latency,
+        upstream=args.upstream,
+        trace=trace,
+        throttle_rate=args.throttle_rate,
+        rpm_limit=args.rpm_limit,
+    )
+    if args.upstream:
+        print(f"Recording calls to {args.upstream} through {server.base_url}")
+    else:
+        print(f"Serving OpenAI-compatible stub at {server.base_url}")
+    print(f"Point clients at it with: export OPENAI_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,283 @@
+"""Measure the CPU cost of turning LLM output text into typed objects.
+
+Synthetic outputs of growing size (``map``: a Map with N walls, ``tasks``: a
+list of N Tasks) and depth (``tree``: Regions nested N levels deep) are fed to
+both output layers with no LLM involved:
+
+- mtllm: the ``[Output] <constructor expression>`` text goes through
+  ``BaseLLM.resolve_output`` of the installed mtllm, against the Jac types in
+  ``materialization_code/output_types.jac``. The model calls it would make to
+  fix a bad output are disabled (see ``NoFixLLM``), so an invalid output
+  raises its original error instead
+- dspy: the JSON text is validated with a pydantic ``TypeAdapter`` over the
+  mirrors in ``materialization_code/output_models.py``, as ``TypedPredictor`` does
+
+Valid outputs report objects/s, MB/s, peak traced memory and the number of
+allocations the parse leaves live (a ``tracemalloc`` snapshot diff). Three
+broken variants of every output (truncated text, a misspelt field, a string
+where an int belongs) report how long it takes to raise, or ``accepted`` when
+the layer builds the object anyway. In MTLLM a raised error normally costs
+another LLM round trip to fix the output.
+
+Python's parser rejects expressions nested more than ~200 brackets deep, so
+mtllm ``tree`` outputs beyond ~100 levels fail even when valid.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from jaclang import JacMachineInterface as Jac
+from mtllm.llms.base import BaseLLM
+from mtllm.types import OutputHint
+from pydantic import TypeAdapter
+
+sys.path.insert(0, "materialization_code")
+import output_models  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+LEVEL = {
+    "name": "Stub Level", "difficulty": 1, "width": 20, "height": 20, "num_wall": 3,
+    "num_enemies": 2, "time_countdown": 120, "n_retries_allowed": 3,
+}
+
+
+def node(type_name, **fields):
+    return {"__type__": type_name, **fields}
+
+
+def position(i):
+    return node("Position", x=i % 20 + 1, y=i // 20 % 20 + 1)
+
+
+def map_output(n):
+    return node(
+        "Map",
+        level=node("Level", **LEVEL),
+        walls=[node("Wall", start_pos=position(i), end_pos=position(i + 1)) for i in range(n)],
+        small_obstacles=[position(i) for i in range(max(1, n // 4))],
+        enemies=[position(i) for i in range(max(1, n // 8))],
+        player_pos=position(0),
+    )
+
+
+def tasks_output(n):
+    return [
+        node("Task", description=f"Work on item {i} of the project backlog", time_in_min=30, priority_out_of_10=i % 10)
+        for i in range(n)
+    ]
+
+
+def tree_output(depth):
+    region = node("Region", name=f"region {depth}", origin=position(depth), children=[])
+    for level in range(depth - 1, 0, -1):
+        region = node("Region", name=f"region {level}", origin=position(level), children=[region])
+    return region
+
+
+WORKLOADS = {
+    "map": (map_output, "Map", output_models.Map, [10, 100, 1000, 10000]),
+    "tasks": (tasks_output, "list[Task]", list[output_models.Task], [10, 100, 1000, 10000]),
+    "tree": (tree_output, "Region", output_models.Region, [5, 25, 50, 100, 200]),
+}
+
+
+class NoFixLLM(BaseLLM):
+    """MTLLM's output resolution with every model call disabled.
+
+    ``resolve_output`` only calls the model to repair an output, so a valid
+    output is parsed exactly as in a real run, and an invalid one raises the
+    error that would have triggered the repair.
+    """
+
+    def __infer__(self, meaning_in, **kwargs):
+        raise RuntimeError("the materialization benchmark makes no LLM calls")
+
+    def _fix_output(self, output, output_hint, output_type_explanations, error):
+        raise error
+
+
+def count_objects(data):
+    if isinstance(data, list):
+        return sum(count_objects(item) for item in data)
+    if isinstance(data, dict):
+        return 1 + sum(count_objects(value) for key, value in data.items() if key != "__type__")
+    return 0
+
+
+def to_jac(data):
+    """Render ``data`` as the constructor expression MTLLM expects after ``[Output]``."""
+    if isinstance(data, list):
+        return "[" + ", ".join(to_jac(item) for item in data) + "]"
+    if isinstance(data, dict):
+        fields = ", ".join(f"{key}={to_jac(value)}" for key, value in data.items() if key != "__type__")
+        return f"{data['__type__']}({fields})"
+    return json.dumps(data)
+
+
+def to_plain(data):
+    if isinstance(data, list):
+        return [to_plain(item) for item in data]
+    if isinstance(data, dict):
+        return {key: to_plain(value) for key, value in data.items() if key != "__type__"}
+    return data
+
+
+def last_node(data):
+    """Return the last object in ``data`` (depth first), which a broken variant modifies."""
+    found = None
+    items = data if isinstance(data, list) else [data]
+    for item in items:
+        if isinstance(item, dict):
+            found = item
+            for value in item.values():
+                found = last_node(value) or found
+    return found
+
+
+def broken_variants(data):
+    """Yield ``(name, data)`` for the invalid outputs built from ``data``; text truncation is done per format."""
+    wrong_field = json.loads(json.dumps(data))
+    target = last_node(wrong_field)
+    key = next(key for key in target if key != "__type__")
+    target[f"{key}_value"] = target.pop(key)
+    yield "wrong_field", wrong_field
+
+    type_mismatch = json.loads(json.dumps(data))
+    target = last_node(type_mismatch)
+    key = next(key for key, value in target.items() if isinstance(value, int))
+    target[key] = "ten"
+    yield "type_mismatch", type_mismatch
+
+
+def parse_mtllm(llm, text, output_type, namespace):
+    return llm.resolve_output(text, OutputHint("", output_type), [], namespace, namespace)
+
+
+def time_parse(parse, text, runs):
+    """Median seconds ``parse(text)`` takes, or the exception it raised."""
+    times = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        try:
+            parse(text)
+        except Exception as e:  # noqa: BLE001 - any failure is a detected invalid output
+            return time.perf_counter() - start_time, e
+        times.append(time.perf_counter() - start_time)
+    return statistics.median(times), None
+
+
+def allocations(parse, text):
+    """Peak traced bytes while parsing, and allocations still live when it returns."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    result = parse(text)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    return peak, sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark parsing LLM output text into typed objects")
+    parser.add_argument(
+        "--workloads",
+        help="Workloads to run",
+        default=list(WORKLOADS),
+        nargs="+",
+        choices=list(WORKLOADS),
+    )
+    parser.add_argument(
+        "--sizes",
+        help="Override the sizes (or depths for tree) for every workload",
+        default=None,
+        nargs="+",
+        type=int,
+    )
+    parser.add_argument("--runs", help="Timed parses per output", default=20, type=int)
+    args = parser.parse_args()
+
+    jac_types = Jac.jac_import(target="output_types", base_path="materialization_code")[0]
+    namespace = vars(jac_types)
+    llm = NoFixLLM()
+
+    rows = []
+    for workload in args.workloads:
+        make_output, output_type, model, sizes = WORKLOADS[workload]
+        adapter = TypeAdapter(model)
+        parsers = {
+            "mtllm": (
+                lambda text: parse_mtllm(llm, text, output_type, namespace),
+                lambda data: f"[Output] {to_jac(data)}",
+            ),
+            "dspy": (adapter.validate_json, lambda data: json.dumps(to_plain(data))),
+        }
+        for size in args.sizes or sizes:
+            data = make_output(size)
+            objects = count_objects(data)
+            for implementation, (parse, render) in parsers.items():
+                text = render(data)
+                seconds, error = time_parse(parse, text, args.runs)
+                row = {
+                    "workload": workload,
+                    "implementation": implementation,
+                    "size": size,
+                    "objects": objects,
+                    "text_bytes": len(text.encode()),
+                    "variant": "valid",
+                    "outcome": f"error:{type(error).__name__}" if error else "ok",
+                    "seconds": seconds,
+                    "objects_per_second": objects / seconds if not error else "",
+                    "mb_per_second": len(text.encode()) / seconds / 1e6 if not error else "",
+                    "peak_alloc_bytes": "",
+                    "allocations": "",
+                }
+                if not error:
+                    row["peak_alloc_bytes"], row["allocations"] = allocations(parse, text)
+                rows.append(row)
+                logging.info(
+                    f"{workload}-{implementation} size {size}: {row['outcome']}, {seconds * 1000:.2f}ms"
+                    + (f", {row['objects_per_second']:.0f} objects/s, {row['mb_per_second']:.1f} MB/s" if not error else "")
+                )
+
+                broken = [("truncated", text[: int(len(text) * 0.9)])]
+                broken += [(variant, render(bad)) for variant, bad in broken_variants(data)]
+                for variant, bad_text in broken:
+                    seconds, error = time_parse(parse, bad_text, 1)
+                    rows.append({
+                        "workload": workload,
+                        "implementation": implementation,
+                        "size": size,
+                        "objects": objects,
+                        "text_bytes": len(bad_text.encode()),
+                        "variant": variant,
+                        "outcome": f"error:{type(error).__name__}" if error else "accepted",
+                        "seconds": seconds,
+                        "objects_per_second": "",
+                        "mb_per_second": "",
+                        "peak_alloc_bytes": "",
+                        "allocations": "",
+                    })
+                    logging.info(
+                        f"{workload}-{implementation} size {size} {variant}: "
+                        f"{rows[-1]['outcome']} after {seconds * 1000:.2f}ms"
+                    )
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_csv = f"materialization_results_{timestamp}.csv"
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    logging.info(f"Results saved to: {output_csv}")
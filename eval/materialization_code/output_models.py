@@ -0,0 +1,46 @@
+"""Pydantic mirrors of output_types.jac, as used by the DSPy TypedPredictor benchmarks."""
+
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class Position(BaseModel):
+    x: int = Field(description="X Coordinate")
+    y: int = Field(description="Y Coordinate")
+
+
+class Wall(BaseModel):
+    start_pos: Position = Field(description="Start Position of the Wall")
+    end_pos: Position = Field(description="End Position of the Wall")
+
+
+class Level(BaseModel):
+    name: str = Field(description="Name of the Level")
+    difficulty: int = Field(description="Difficulty of the Level")
+    width: int = Field(description="Width of the Map")
+    height: int = Field(description="Height of the Map")
+    num_wall: int = Field(description="Number of Walls in the Map")
+    num_enemies: int = Field(description="Number of Enemies in the Map")
+    time_countdown: int = Field(description="Time Countdown of the Level")
+    n_retries_allowed: int = Field(description="Number of Retries Allowed")
+
+
+class Map(BaseModel):
+    level: Level = Field(description="Level of the Map")
+    walls: list[Wall] = Field(description="Walls in the Map Other than Edges")
+    small_obstacles: List[Position] = Field(description="Obstacles in the Map")
+    enemies: list[Position] = Field(description="Enemies in the Map")
+    player_pos: Position = Field(description="Player Position in the Map")
+
+
+class Task(BaseModel):
+    description: str = Field(description="Content of the Job to be done")
+    time_in_min: int = Field(description="Estimated time in minutes for one to finish the job")
+    priority_out_of_10: int = Field(description="Estimated Priority for the Task (0-10)")
+
+
+class Region(BaseModel):
+    name: str = Field(description="Name of the Region")
+    origin: Position = Field(description="Origin of the Region")
+    children: list["Region"] = Field(description="Sub Regions")
@@ -1,4 +1,6 @@
 import os
+import argparse
+import json
 import subprocess
 import csv
 import time
@@ -13,6 +15,9 @@ os.environ["OPENAI_CACHE"] = "false"
 import logging
 import shutil
 
+from llm_stub_server import LLMStubServer, client_env, program_command, program_file
+from sharding import WorkQueue, file_sweep, parse_shard, parse_sweep, shard_items
+
 # Suppress WARNING logs from DSPy
 logging.getLogger().setLevel(logging.ERROR)
 
@@ -26,6 +31,19 @@ logging.basicConfig(
     ]
 )
 
+DETAILED_FIELDNAMES = ['benchmark', 'implementation', 'file_path', 'run_number', 
+                       'file_exists', 'success', 'execution_time', 'return_code', 
+                       'command', 'stdout', 'stderr', 'llm_calls', 'prompt_tokens',
+                       'completion_tokens', 'cached_tokens', 'llm_time', 'time_to_first_token',
+                       'timestamp']
+SUMMARY_FIELDNAMES = ['benchmark', 'implementation', 'file_path', 'file_exists',
+                      'total_runs', 'successful_runs', 'failed_runs', 'success_rate',
+                      'avg_execution_time', 'min_execution_time', 'max_execution_time',
+                      'median_execution_time', 'p90_execution_time', 'p95_execution_time',
+                      'p99_execution_time', 'std_execution_time', 'avg_llm_calls',
+                      'avg_prompt_tokens', 'avg_completion_tokens', 'avg_llm_time',
+                      'avg_time_to_first_token', 'timestamp']
+
 def get_folder_names(directory_path):
     folder_names = []
     for item in os.listdir(directory_path):
@@ -34,17 +52,34 @@ def get_folder_names(directory_path):
             folder_names.append(item)
     return folder_names
 
-def run_file_and_capture_output(file_path, implementation):
+def percentile(values, q):
+    """Linearly interpolated q-th percentile (1-99) of values"""
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1]
+
+def summarize_calls(calls):
+    """Aggregate the traced LLM calls of one run
+
+    time_to_first_token is the mean over the run's streamed calls, or empty
+    when none of its calls streamed.
+    """
+    first_tokens = [call['time_to_first_token'] for call in calls if call.get('time_to_first_token') is not None]
+    return {
+        'llm_calls': len(calls),
+        'prompt_tokens': sum(call['prompt_tokens'] for call in calls),
+        'completion_tokens': sum(call['completion_tokens'] for call in calls),
+        'cached_tokens': sum(call['cached_tokens'] for call in calls),
+        'llm_time': sum(call['network_time'] for call in calls),
+        'time_to_first_token': statistics.mean(first_tokens) if first_tokens else ''
+    }
+
+def run_file_and_capture_output(file_path, implementation, env=None):
     """Run a file and capture its output"""
     try:
         start_time = time.time()
         
-        # Determine command based on implementation
-        if implementation == 'lmql':
-            cmd = ['python', file_path]
-        elif implementation == 'mtllm':
-            cmd = ['jac', 'run', file_path]
-        else:  # dspy
+        if implementation == 'dspy':
             # Remove __pycache__ directories before running
             folder = os.path.dirname(file_path)
             for root, dirs, files in os.walk(folder):
@@ -55,9 +90,9 @@ def run_file_and_capture_output(file_path, implementation):
                             shutil.rmtree(pycache_path)
                         except Exception as e:
                             logging.warning(f"Failed to remove {pycache_path}: {e}")
-            cmd = ['python', file_path]
+        cmd = program_command(file_path)
         
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300, env=env)
         
         end_time = time.time()
         execution_time = end_time - start_time
@@ -90,35 +125,44 @@ def run_file_and_capture_output(file_path, implementation):
             'command': 'Error before execution'
         }
 
-def run_multiple_times(file_path, implementation, num_runs=10):
-    """Run a file multiple times and collect statistics"""
+def run_multiple_times(file_path, implementation, num_runs=10, server=None):
+    """Run a file multiple times and collect statistics
+
+    When a recording server is given, every run's LLM calls are routed through
+    it and attached to the run result under 'calls'.
+    """
     results = []
-    execution_times = []
-    success_count = 0
     
     logging.info(f"Running {file_path} {num_runs} times...")
     
     for run_num in range(1, num_runs + 1):
         logging.info(f"  Run {run_num}/{num_runs}")
-        result = run_file_and_capture_output(file_path, implementation)
+        env = client_env(server.base_url) if server else None
+        result = run_file_and_capture_output(file_path, implementation, env)
+        if server:
+            result['calls'] = server.drain()
+            result.update(summarize_calls(result['calls']))
         
         # Store individual result
         result['run_number'] = run_num
         results.append(result)
         
-        if result['success']:
-            success_count += 1
-            execution_times.append(result['execution_time'])
-        
         # Small delay between runs to avoid overwhelming the system
         time.sleep(0.1)
     
+    return results, compute_stats(results, traced=server is not None)
+
+def compute_stats(results, traced=False):
+    """Summary statistics over the runs of one benchmark implementation"""
+    execution_times = [result['execution_time'] for result in results if result['success']]
+    success_count = len(execution_times)
+    
     # Calculate statistics
     stats = {
-        'total_runs': num_runs,
+        'total_runs': len(results),
         'successful_runs': success_count,
-        'success_rate': (success_count / num_runs) * 100,
-        'failed_runs': num_runs - success_count
+        'success_rate': (success_count / len(results)) * 100 if results else 0,
+        'failed_runs': len(results) - success_count
     }
     
     if execution_times:
@@ -127,152 +171,333 @@ def run_multiple_times(file_path, implementation, num_runs=10):
             'min_execution_time': min(execution_times),
             'max_execution_time': max(execution_times),
             'median_execution_time': statistics.median(execution_times),
+            'p90_execution_time': percentile(execution_times, 90),
+            'p95_execution_time': percentile(execution_times, 95),
+            'p99_execution_time': percentile(execution_times, 99),
             'std_execution_time': statistics.stdev(execution_times) if len(execution_times) > 1 else 0
         })
+        if traced:
+            successful = [result for result in results if result['success']]
+            for key in ['llm_calls', 'prompt_tokens', 'completion_tokens', 'llm_time']:
+                stats[f'avg_{key}'] = statistics.mean(result[key] for result in successful)
+            first_tokens = [result['time_to_first_token'] for result in successful
+                            if result.get('time_to_first_token', '') != '']
+            if first_tokens:
+                stats['avg_time_to_first_token'] = statistics.mean(first_tokens)
     else:
         stats.update({
             'avg_execution_time': 0,
             'min_execution_time': 0,
             'max_execution_time': 0,
             'median_execution_time': 0,
+            'p90_execution_time': 0,
+            'p95_execution_time': 0,
+            'p99_execution_time': 0,
             'std_execution_time': 0
         })
     
-    return results, stats
+    return stats
+
+def merge_results(detailed_csvs, sweep=None):
+    """Combine the detailed CSVs of several shards or workers into one sweep
+
+    Runs are keyed by benchmark, implementation and run number; if a run shows
+    up in more than one file (e.g. a queue item that was retried), the latest
+    one wins. The summary is recomputed from the merged runs, and the shards'
+    trace files are concatenated when present. The merged files keep the sweep
+    id of the parts (or ``sweep`` when given), so the sweep stays one sweep.
+    """
+    if sweep is None:
+        sweeps = {file_sweep(path) for path in detailed_csvs}
+        if len(sweeps) != 1 or None in sweeps:
+            raise SystemExit(f"The files belong to sweeps {sorted(map(str, sweeps))}; pass --sweep to merge them as one")
+        sweep = sweeps.pop()
+    runs = {}
+    for detailed_csv in detailed_csvs:
+        with open(detailed_csv, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                key = (row['benchmark'], row['implementation'], int(row['run_number']))
+                if key not in runs or row['timestamp'] > runs[key]['timestamp']:
+                    runs[key] = row
+    
+    detailed_csv = f'benchmark_detailed_results_{sweep}.csv'
+    summary_csv = f'benchmark_summary_results_{sweep}.csv'
+    with open(detailed_csv, 'w', newline='', encoding='utf-8') as detailed_file, \
+            open(summary_csv, 'w', newline='', encoding='utf-8') as summary_file:
+        detailed_writer = csv.DictWriter(detailed_file, fieldnames=DETAILED_FIELDNAMES, extrasaction='ignore')
+        summary_writer = csv.DictWriter(summary_file, fieldnames=SUMMARY_FIELDNAMES)
+        detailed_writer.writeheader()
+        summary_writer.writeheader()
+        
+        for benchmark, implementation in sorted({key[:2] for key in runs}):
+            rows = [runs[key] for key in sorted(runs) if key[:2] == (benchmark, implementation)]
+            detailed_writer.writerows(rows)
+            
+            file_exists = rows[0]['file_exists'] == 'True'
+            traced = file_exists and all(row.get('llm_calls') for row in rows)
+            results = [] if not file_exists else [{
+                'success': row['success'] == 'True',
+                'execution_time': float(row['execution_time']),
+                **({key: float(row[key]) for key in ['llm_calls', 'prompt_tokens', 'completion_tokens', 'llm_time']}
+                   if traced else {}),
+                'time_to_first_token': float(row['time_to_first_token']) if row.get('time_to_first_token') else ''
+            } for row in rows]
+            summary_writer.writerow({
+                'benchmark': benchmark,
+                'implementation': implementation,
+                'file_path': rows[0]['file_path'],
+                'file_exists': file_exists,
+                **compute_stats(results, traced),
+                'timestamp': datetime.now().isoformat()
+            })
+    
+    trace_jsonls = [path.replace('benchmark_detailed_results_', 'benchmark_trace_').replace('.csv', '.jsonl')
+                    for path in detailed_csvs]
+    trace_jsonls = [path for path in trace_jsonls if os.path.exists(path)]
+    if trace_jsonls:
+        trace_jsonl = f'benchmark_trace_{sweep}.jsonl'
+        with open(trace_jsonl, 'w', encoding='utf-8') as trace_file:
+            for path in trace_jsonls:
+                with open(path, encoding='utf-8') as f:
+                    shutil.copyfileobj(f, trace_file)
+        logging.info(f"LLM call trace saved to: {trace_jsonl}")
+    
+    logging.info(f"Merged {len(runs)} runs from {len(detailed_csvs)} files")
+    logging.info(f"Detailed results saved to: {detailed_csv}")
+    logging.info(f"Summary statistics saved to: {summary_csv}")
 
 def main():
-    benchmarks = get_folder_names('../benchmarks')
+    parser = argparse.ArgumentParser(description="Run every benchmark implementation and summarize the results")
+    parser.add_argument(
+        "--trace",
+        help="Route LLM calls through a recording proxy and trace every call",
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--upstream",
+        help="API base URL the recording proxy relays to",
+        default="https://api.openai.com/v1",
+        type=str,
+    )
+    parser.add_argument("--runs", help="Runs per benchmark implementation", default=20, type=int)
+    parser.add_argument(
+        "--shard",
+        help="Run only shard i of N (e.g. 2/4) of the benchmark x implementation list",
+        default=None,
+        type=parse_shard,
+    )
+    parser.add_argument(
+        "--queue",
+        help="SQLite file to pull benchmark implementations from, shared with other workers",
+        default=None,
+        type=str,
+    )
+    parser.add_argument(
+        "--queue_lease",
+        help="Seconds after which a queue item still running (e.g. its worker was killed) is handed to another "
+        "worker (default: the longest an item can take, --runs x 300 s)",
+        default=None,
+        type=float,
+    )
+    parser.add_argument(
+        "--sweep",
+        help="Sweep id (YYYYmmdd_HHMMSS) the output files are named after; give every shard the same one "
+        "(default: the start time, or with --merge the id in the merged files' names)",
+        default=None,
+        type=parse_sweep,
+    )
+    parser.add_argument(
+        "--merge",
+        help="Combine the detailed results CSVs of several shards/workers and recompute the summary",
+        default=None,
+        nargs="+",
+    )
+    args = parser.parse_args()
+
+    if args.merge:
+        merge_results(args.merge, args.sweep)
+        return
+    timestamp = args.sweep or datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    benchmarks = sorted(get_folder_names('../benchmarks'))
     implementations = ['lmql', 'dspy', 'mtllm']
-    num_runs = 20
+    num_runs = args.runs
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    detailed_csv = f'benchmark_detailed_results_{timestamp}.csv'
-    summary_csv = f'benchmark_summary_results_{timestamp}.csv'
+    # Every worker builds the same list, so shards and queue items line up across hosts
+    units = [(benchmark, implementation) for benchmark in benchmarks for implementation in implementations]
+    suffix = ''
+    if args.shard:
+        units = shard_items(units, args.shard)
+        suffix = f'_shard{args.shard[0]}of{args.shard[1]}'
+    elif args.queue:
+        queue = WorkQueue(
+            args.queue,
+            [f'{benchmark}/{implementation}' for benchmark, implementation in units],
+            lease=args.queue_lease or num_runs * 300 + 60,
+            sweep=timestamp,
+        )
+        units = (tuple(item.split('/')) for item in queue)
+        # Name the files after the sweep the first worker started, so one glob finds every worker's output
+        timestamp = queue.sweep
+        suffix = f'_{queue.worker}'
+        logging.info(f"Pulling work from {args.queue} for sweep {queue.sweep} as worker {queue.worker}")
+    
+    detailed_csv = f'benchmark_detailed_results_{timestamp}{suffix}.csv'
+    summary_csv = f'benchmark_summary_results_{timestamp}{suffix}.csv'
+    trace_jsonl = f'benchmark_trace_{timestamp}{suffix}.jsonl'
     
     logging.info(f"Starting benchmark execution with {num_runs} runs per file")
     logging.info(f"Detailed results: {detailed_csv}")
     logging.info(f"Summary results: {summary_csv}")
+
+    server = None
+    trace_file = None
+    if args.trace:
+        server = LLMStubServer(upstream=args.upstream).start()
+        trace_file = open(trace_jsonl, 'w', encoding='utf-8')
+        logging.info(f"Tracing LLM calls to {args.upstream} via {server.base_url}: {trace_jsonl}")
     
     # Detailed results CSV (individual runs)
     with open(detailed_csv, 'w', newline='', encoding='utf-8') as detailed_file:
-        detailed_fieldnames = ['benchmark', 'implementation', 'file_path', 'run_number', 
-                              'file_exists', 'success', 'execution_time', 'return_code', 
-                              'command', 'stdout', 'stderr', 'timestamp']
-        detailed_writer = csv.DictWriter(detailed_file, fieldnames=detailed_fieldnames)
+        detailed_writer = csv.DictWriter(detailed_file, fieldnames=DETAILED_FIELDNAMES)
         detailed_writer.writeheader()
         
         # Summary results CSV (aggregated statistics)
         with open(summary_csv, 'w', newline='', encoding='utf-8') as summary_file:
-            summary_fieldnames = ['benchmark', 'implementation', 'file_path', 'file_exists',
-                                 'total_runs', 'successful_runs', 'failed_runs', 'success_rate',
-                                 'avg_execution_time', 'min_execution_time', 'max_execution_time',
-                                 'median_execution_time', 'std_execution_time', 'timestamp']
-            summary_writer = csv.DictWriter(summary_file, fieldnames=summary_fieldnames)
+            summary_writer = csv.DictWriter(summary_file, fieldnames=SUMMARY_FIELDNAMES)
             summary_writer.writeheader()
             
             total_files = 0
             processed_files = 0
             
-            for benchmark in benchmarks:
-                # if benchmark not in ["rpg_level_gen"]:
-                #     continue
-                for implementation in implementations:
-                    total_files += 1
-                    folder_path = f'../benchmarks/{benchmark}/{benchmark}_{implementation}'
-                    file_path = f'{folder_path}.jac' if implementation == 'mtllm' else f'{folder_path}.py'
+            for benchmark, implementation in units:
+                total_files += 1
+                file_path = program_file(benchmark, implementation)
+                
+                logging.info(f"Processing {total_files}: {benchmark} - {implementation}")
+                
+                if not os.path.exists(file_path):
+                    logging.warning(f"File not found: {file_path}")
                     
-                    logging.info(f"Processing {total_files}: {benchmark} - {implementation}")
-                    
-                    if not os.path.exists(file_path):
-                        logging.warning(f"File not found: {file_path}")
-                        
-                        # Write to both CSV files for missing files
-                        missing_file_row = {
-                            'benchmark': benchmark,
-                            'implementation': implementation,
-                            'file_path': file_path,
-                            'file_exists': False,
-                            'timestamp': datetime.now().isoformat()
-                        }
-                        
-                        # Detailed CSV entry for missing file
-                        detailed_row = missing_file_row.copy()
-                        detailed_row.update({
-                            'run_number': 1,
-                            'success': False,
-                            'execution_time': 0,
-                            'return_code': -1,
-                            'command': 'N/A',
-                            'stdout': '',
-                            'stderr': 'File not found'
-                        })
-                        detailed_writer.writerow(detailed_row)
-                        
-                        # Summary CSV entry for missing file
-                        summary_row = missing_file_row.copy()
-                        summary_row.update({
-                            'total_runs': 0,
-                            'successful_runs': 0,
-                            'failed_runs': 0,
-                            'success_rate': 0,
-                            'avg_execution_time': 0,
-                            'min_execution_time': 0,
-                            'max_execution_time': 0,
-                            'median_execution_time': 0,
-                            'std_execution_time': 0
-                        })
-                        summary_writer.writerow(summary_row)
-                        continue
-                    
-                    processed_files += 1
-                    
-                    # Run the file multiple times
-                    results, stats = run_multiple_times(file_path, implementation, num_runs)
+                    # Write to both CSV files for missing files
+                    missing_file_row = {
+                        'benchmark': benchmark,
+                        'implementation': implementation,
+                        'file_path': file_path,
+                        'file_exists': False,
+                        'timestamp': datetime.now().isoformat()
+                    }
                     
-                    # Write detailed results
-                    for result in results:
-                        detailed_writer.writerow({
-                            'benchmark': benchmark,
-                            'implementation': implementation,
-                            'file_path': file_path,
-                            'run_number': result['run_number'],
-                            'file_exists': True,
-                            'success': result['success'],
-                            'execution_time': result['execution_time'],
-                            'return_code': result['return_code'],
-                            'command': result['command'],
-                            'stdout': result['stdout'],
-                            'stderr': result['stderr'],
-                            'timestamp': datetime.now().isoformat()
-                        })
+                    # Detailed CSV entry for missing file
+                    detailed_row = missing_file_row.copy()
+                    detailed_row.update({
+                        'run_number': 1,
+                        'success': False,
+                        'execution_time': 0,
+                        'return_code': -1,
+                        'command': 'N/A',
+                        'stdout': '',
+                        'stderr': 'File not found'
+                    })
+                    detailed_writer.writerow(detailed_row)
                     
-                    # Write summary results
-                    summary_writer.writerow({
+                    # Summary CSV entry for missing file
+                    summary_row = missing_file_row.copy()
+                    summary_row.update({
+                        'total_runs': 0,
+                        'successful_runs': 0,
+                        'failed_runs': 0,
+                        'success_rate': 0,
+                        'avg_execution_time': 0,
+                        'min_execution_time': 0,
+                        'max_execution_time': 0,
+                        'median_execution_time': 0,
+                        'p90_execution_time': 0,
+                        'p95_execution_time': 0,
+                        'p99_execution_time': 0,
+                        'std_execution_time': 0
+                    })
+                    summary_writer.writerow(summary_row)
+                    continue
+                
+                processed_files += 1
+                
+                # Run the file multiple times
+                results, stats = run_multiple_times(file_path, implementation, num_runs, server)
+                
+                # Write detailed results
+                for result in results:
+                    if trace_file:
+                        for call in result['calls']:
+                            trace_file.write(json.dumps({
+                                'benchmark': benchmark,
+                                'implementation': implementation,
+                                'run_number': result['run_number'],
+                                **call
+                            }) + '\n')
+                    detailed_writer.writerow({
                         'benchmark': benchmark,
                         'implementation': implementation,
                         'file_path': file_path,
+                        'run_number': result['run_number'],
                         'file_exists': True,
-                        'total_runs': stats['total_runs'],
-                        'successful_runs': stats['successful_runs'],
-                        'failed_runs': stats['failed_runs'],
-                        'success_rate': stats['success_rate'],
-                        'avg_execution_time': stats['avg_execution_time'],
-                        'min_execution_time': stats['min_execution_time'],
-                        'max_execution_time': stats['max_execution_time'],
-                        'median_execution_time': stats['median_execution_time'],
-                        'std_execution_time': stats['std_execution_time'],
+                        'success': result['success'],
+                        'execution_time': result['execution_time'],
+                        'return_code': result['return_code'],
+                        'command': result['command'],
+                        'stdout': result['stdout'],
+                        'stderr': result['stderr'],
+                        'llm_calls': result.get('llm_calls', ''),
+                        'prompt_tokens': result.get('prompt_tokens', ''),
+                        'completion_tokens': result.get('completion_tokens', ''),
+                        'cached_tokens': result.get('cached_tokens', ''),
+                        'llm_time': result.get('llm_time', ''),
+                        'time_to_first_token': result.get('time_to_first_token', ''),
                         'timestamp': datetime.now().isoformat()
                     })
-                    
-                    logging.info(f"Completed {benchmark}-{implementation}: "
-                              f"{stats['successful_runs']}/{stats['total_runs']} successful "
-                              f"(Success rate: {stats['success_rate']:.1f}%)")
-                    
-                    if stats['successful_runs'] > 0:
-                        logging.info(f"  Avg time: {stats['avg_execution_time']:.2f}s, "
-                                  f"Min: {stats['min_execution_time']:.2f}s, "
-                                  f"Max: {stats['max_execution_time']:.2f}s")
-    
+                
+                # Write summary results
+                summary_writer.writerow({
+                    'benchmark': benchmark,
+                    'implementation': implementation,
+                    'file_path': file_path,
+                    'file_exists': True,
+                    'total_runs': stats['total_runs'],
+                    'successful_runs': stats['successful_runs'],
+                    'failed_runs': stats['failed_runs'],
+                    'success_rate': stats['success_rate'],
+                    'avg_execution_time': stats['avg_execution_time'],
+                    'min_execution_time': stats['min_execution_time'],
+                    'max_execution_time': stats['max_execution_time'],
+                    'median_execution_time': stats['median_execution_time'],
+                    'p90_execution_time': stats['p90_execution_time'],
+                    'p95_execution_time': stats['p95_execution_time'],
+                    'p99_execution_time': stats['p99_execution_time'],
+                    'std_execution_time': stats['std_execution_time'],
+                    'avg_llm_calls': stats.get('avg_llm_calls', ''),
+                    'avg_prompt_tokens': stats.get('avg_prompt_tokens', ''),
+                    'avg_completion_tokens': stats.get('avg_completion_tokens', ''),
+                    'avg_llm_time': stats.get('avg_llm_time', ''),
+                    'avg_time_to_first_token': stats.get('avg_time_to_first_token', ''),
+                    'timestamp': datetime.now().isoformat()
+                })
+                
+                logging.info(f"Completed {benchmark}-{implementation}: "
+                          f"{stats['successful_runs']}/{stats['total_runs']} successful "
+                          f"(Success rate: {stats['success_rate']:.1f}%)")
+                
+                if stats['successful_runs'] > 0:
+                    logging.info(f"  Avg time: {stats['avg_execution_time']:.2f}s, "
+                              f"Min: {stats['min_execution_time']:.2f}s, "
+                              f"P99: {stats['p99_execution_time']:.2f}s, "
+                              f"Max: {stats['max_execution_time']:.2f}s")
+
+    if server:
+        server.stop()
+        trace_file.close()
+        logging.info(f"LLM call trace saved to: {trace_jsonl}")
+
     logging.info(f"Execution complete. Processed {processed_files}/{total_files} files.")
     logging.info(f"Detailed results saved to: {detailed_csv}")
     logging.info(f"Summary statistics saved to: {summary_csv}")
@@ -0,0 +1,97 @@
+"""Measure how much of each prompt a provider prefix cache could reuse.
+
+Runs a benchmark (essay_reviewer by default, whose ``essay_judge`` calls
+differ only in ``criteria``) against the stub server. For every request the
+stub reports the longest prefix it shares with an earlier prompt of the same
+run (the server is drained between runs, which resets its history), and the part
+of that prefix OpenAI would bill as cached (1024-token minimum, then 128-token
+increments). A layout that puts static content first and call arguments last
+scores a high shared share.
+"""
+
+import argparse
+import csv
+import logging
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from llm_stub_server import LLMStubServer, client_env, load_rules, program_command, program_file
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure prompt prefix sharing across by llm() calls")
+    parser.add_argument("--benchmark", help="Benchmark to run", default="essay_reviewer", type=str)
+    parser.add_argument(
+        "--impl",
+        help="Implementations to run",
+        default=["mtllm", "dspy"],
+        nargs="+",
+        choices=["mtllm", "dspy"],
+    )
+    parser.add_argument(
+        "--rules",
+        help="Stub server response rules (defaults to stub_rules/<benchmark>.json)",
+        default=None,
+        type=str,
+    )
+    parser.add_argument("--runs", help="Runs per implementation", default=3, type=int)
+    args = parser.parse_args()
+
+    server = LLMStubServer(rules=load_rules(args.rules or f"stub_rules/{args.benchmark}.json")).start()
+    rows = []
+    try:
+        for implementation in args.impl:
+            for run_num in range(1, args.runs + 1):
+                start_time = time.time()
+                result = subprocess.run(
+                    program_command(program_file(args.benchmark, implementation)),
+                    capture_output=True,
+                    text=True,
+                    env=client_env(server.base_url),
+                    timeout=300,
+                )
+                if result.returncode != 0:
+                    logging.warning(f"{implementation} run {run_num} failed: {result.stderr.strip()[-300:]}")
+                for request_num, request in enumerate(server.drain(), start=1):
+                    rows.append({
+                        "benchmark": args.benchmark,
+                        "implementation": implementation,
+                        "run_number": run_num,
+                        "request_number": request_num,
+                        "rule": request["rule"],
+                        "prompt_tokens": request["prompt_tokens"],
+                        "shared_prefix_tokens": request["shared_prefix_tokens"],
+                        "cached_tokens": request["cached_tokens"],
+                    })
+    finally:
+        server.stop()
+
+    totals = defaultdict(lambda: [0, 0, 0])
+    for row in rows:
+        total = totals[(row["implementation"], row["rule"])]
+        total[0] += row["prompt_tokens"]
+        total[1] += row["shared_prefix_tokens"]
+        total[2] += row["cached_tokens"]
+    for (implementation, rule), (prompt, shared, cached) in sorted(totals.items(), key=str):
+        logging.info(
+            f"{implementation} {rule}: {prompt} prompt tokens, "
+            f"{shared / prompt * 100:.1f}% shared prefix, {cached / prompt * 100:.1f}% cacheable"
+        )
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_csv = f"prefix_cache_results_{timestamp}.csv"
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(
+            f,
+            fieldnames=[
+                "benchmark", "implementation", "run_number", "request_number",
+                "rule", "prompt_tokens", "shared_prefix_tokens", "cached_tokens",
+            ],
+        )
+        writer.writeheader()
+        writer.writerows(rows)
+    logging.info(f"Results saved to: {output_csv}")
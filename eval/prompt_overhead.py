@@ -0,0 +1,111 @@
+"""Measure the per-call runtime overhead of ``by llm()`` calls on rich types.
+
+Runs ``prompt_overhead_code/jac_impl.jac`` (the ``Level``/``Map`` call sites of
+rpg_level_gen) against the local stub server and subtracts the server's own
+handling time from each call's wall time. What is left is the work MTLLM does
+per call: rendering types and arguments into the prompt, the HTTP round trip
+on loopback and parsing the output. First-call and steady-state figures are
+reported separately, so per-type prompt caching shows up as a lower
+steady-state overhead.
+
+``--history`` sweeps the length of the ``last_levels: list[Level]`` argument
+and reports the prompt tokens each call site sends, which is the baseline for
+comparing more compact renderings of large object arguments.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import statistics
+import subprocess
+from datetime import datetime
+
+from llm_stub_server import LLMStubServer, client_env, load_rules
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def run_calls(program, n_calls, history, server):
+    """Run the Jac program against ``server`` and return its per-call timings and requests."""
+    env = client_env(server.base_url)
+    env["N_CALLS"] = str(n_calls)
+    env["HISTORY"] = str(history)
+    result = subprocess.run(["jac", "run", program], capture_output=True, text=True, env=env, timeout=600)
+    if result.returncode != 0:
+        raise RuntimeError(f"{program} failed:\n{result.stderr}")
+    calls = [json.loads(line) for line in result.stdout.splitlines() if line.startswith("{")]
+    return calls, server.drain()
+
+
+def summarize(calls, requests):
+    """Aggregate call timings and stub requests into one row per call site."""
+    rows = []
+    for site in sorted({call["site"] for call in calls}):
+        times = [call["seconds"] for call in calls if call["site"] == site]
+        served = [request for request in requests if request["rule"] == site]
+        requests_per_call = len(served) / len(times)
+        server_time = statistics.mean(r["handle_time"] for r in served) * requests_per_call if served else 0.0
+        steady = times[1:] or times
+        rows.append({
+            "site": site,
+            "calls": len(times),
+            "requests_per_call": requests_per_call,
+            "avg_request_bytes": statistics.mean(r["request_bytes"] for r in served) if served else 0,
+            "avg_prompt_tokens": statistics.mean(r["prompt_tokens"] for r in served) if served else 0,
+            "first_call_overhead": times[0] - server_time,
+            "steady_overhead_mean": statistics.mean(steady) - server_time,
+            "steady_overhead_median": statistics.median(steady) - server_time,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure per-call MTLLM prompt overhead against a stub server")
+    parser.add_argument("--calls", help="Calls per call site", default=50, type=int)
+    parser.add_argument(
+        "--program",
+        help="Jac program to run",
+        default="prompt_overhead_code/jac_impl.jac",
+        type=str,
+    )
+    parser.add_argument(
+        "--rules",
+        help="Stub server response rules",
+        default="stub_rules/rpg_level_gen.json",
+        type=str,
+    )
+    parser.add_argument(
+        "--history",
+        help="Comma separated lengths of the last_levels argument to try",
+        default="1",
+        type=str,
+    )
+    args = parser.parse_args()
+
+    server = LLMStubServer(rules=load_rules(args.rules)).start()
+    rows = []
+    try:
+        for history in [int(n) for n in args.history.split(",")]:
+            calls, requests = run_calls(args.program, args.calls, history, server)
+            for row in summarize(calls, requests):
+                rows.append({"history": history, **row})
+    finally:
+        server.stop()
+
+    for row in rows:
+        logging.info(
+            f"{row['site']} (history {row['history']}): first call {row['first_call_overhead'] * 1000:.2f}ms, "
+            f"steady mean {row['steady_overhead_mean'] * 1000:.2f}ms, "
+            f"median {row['steady_overhead_median'] * 1000:.2f}ms, "
+            f"{row['requests_per_call']:.2f} requests/call, "
+            f"{row['avg_prompt_tokens']:.0f} prompt tokens/request"
+        )
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_csv = f"prompt_overhead_results_{timestamp}.csv"
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ["history", "site"])
+        writer.writeheader()
+        writer.writerows(rows)
+    logging.info(f"Results saved to: {output_csv}")
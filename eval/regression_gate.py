@@ -0,0 +1,154 @@
+"""Fail when a candidate sweep is significantly slower or less reliable than a baseline.
+
+Compares two sets of per-run results (``benchmark_detailed_results_*.csv``
+files, or sweep ids already ingested with results_store.py) for every
+benchmark and implementation present in both:
+
+- latency: one-sided Mann-Whitney U test on the execution times of successful
+  runs, with Cliff's delta as effect size and the candidate/baseline median ratio
+- success rate: one-sided two-proportion z-test, with Cohen's h as effect size
+
+P-values are Holm-adjusted across all tests. A test counts as a regression
+when its adjusted p-value is below ``--alpha`` and the effect is larger than
+the practical threshold (``--min_slowdown``, ``--min_success_drop``). The
+script writes a CSV report and exits with status 1 if any regression is found,
+so it can gate a jaclang/mtllm upgrade in CI. Sweeps recorded against the stub
+server are the most stable input, since provider latency drops out.
+"""
+
+import argparse
+import logging
+import math
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+from scipy import stats
+
+from results_store import load_csv, read_store
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def load_runs(source, store):
+    """Runs from a detailed results CSV, or from the store when ``source`` is a sweep id."""
+    if os.path.exists(source):
+        return load_csv(source)
+    runs = read_store(store)
+    runs = runs[runs["sweep"] == source]
+    if runs.empty:
+        raise SystemExit(f"{source} is neither a results file nor a sweep in {store}")
+    return runs
+
+
+def holm(p_values):
+    """Holm-Bonferroni adjusted p-values, in the input order."""
+    order = sorted(range(len(p_values)), key=lambda i: p_values[i])
+    adjusted = [1.0] * len(p_values)
+    running_max = 0.0
+    for rank, i in enumerate(order):
+        running_max = max(running_max, min(1.0, (len(p_values) - rank) * p_values[i]))
+        adjusted[i] = running_max
+    return adjusted
+
+
+def latency_test(baseline, candidate):
+    """P-value that candidate times are stochastically larger, Cliff's delta and median ratio."""
+    result = stats.mannwhitneyu(candidate, baseline, alternative="greater")
+    cliffs_delta = 2 * result.statistic / (len(candidate) * len(baseline)) - 1
+    return result.pvalue, cliffs_delta, candidate.median() / baseline.median()
+
+
+def success_test(baseline_successes, baseline_runs, candidate_successes, candidate_runs):
+    """P-value that the candidate success rate is lower, and Cohen's h (negative when it dropped)."""
+    baseline_rate = baseline_successes / baseline_runs
+    candidate_rate = candidate_successes / candidate_runs
+    pooled = (baseline_successes + candidate_successes) / (baseline_runs + candidate_runs)
+    standard_error = math.sqrt(pooled * (1 - pooled) * (1 / baseline_runs + 1 / candidate_runs))
+    p_value = stats.norm.cdf((candidate_rate - baseline_rate) / standard_error) if standard_error else 1.0
+    cohens_h = 2 * math.asin(math.sqrt(candidate_rate)) - 2 * math.asin(math.sqrt(baseline_rate))
+    return p_value, cohens_h
+
+
+def compare(baseline, candidate, min_samples):
+    """One row per benchmark, implementation and metric with the raw test results."""
+    rows = []
+    keys = ["benchmark", "implementation"]
+    baseline = baseline.dropna(subset=["success"])
+    candidate = candidate.dropna(subset=["success"])
+    pairs = baseline[keys].drop_duplicates().merge(candidate[keys].drop_duplicates())
+    for benchmark, implementation in pairs.itertuples(index=False):
+        base = baseline[(baseline["benchmark"] == benchmark) & (baseline["implementation"] == implementation)]
+        cand = candidate[(candidate["benchmark"] == benchmark) & (candidate["implementation"] == implementation)]
+        row = {"benchmark": benchmark, "implementation": implementation}
+
+        base_times = base.loc[base["success"].astype(bool), "execution_time"]
+        cand_times = cand.loc[cand["success"].astype(bool), "execution_time"]
+        if len(base_times) >= min_samples and len(cand_times) >= min_samples:
+            p_value, cliffs_delta, median_ratio = latency_test(base_times, cand_times)
+            rows.append({**row, "metric": "latency", "baseline": base_times.median(),
+                         "candidate": cand_times.median(), "effect_size": cliffs_delta,
+                         "change": median_ratio - 1, "p_value": p_value})
+        else:
+            logging.warning(f"{benchmark}-{implementation}: too few successful runs for a latency test")
+
+        base_successes, cand_successes = int(base["success"].sum()), int(cand["success"].sum())
+        p_value, cohens_h = success_test(base_successes, len(base), cand_successes, len(cand))
+        rows.append({**row, "metric": "success_rate", "baseline": base_successes / len(base) * 100,
+                     "candidate": cand_successes / len(cand) * 100, "effect_size": cohens_h,
+                     "change": (cand_successes / len(cand) - base_successes / len(base)) * 100,
+                     "p_value": p_value})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test a candidate sweep for latency and success regressions")
+    parser.add_argument("baseline", help="Baseline detailed results CSV or sweep id in the store", type=str)
+    parser.add_argument("candidate", help="Candidate detailed results CSV or sweep id in the store", type=str)
+    parser.add_argument("--store", help="Parquet store used for sweep ids", default="results_store", type=str)
+    parser.add_argument("--alpha", help="Significance level after Holm adjustment", default=0.05, type=float)
+    parser.add_argument(
+        "--min_slowdown",
+        help="Smallest median latency increase that counts as a regression (0.1 = 10%%)",
+        default=0.1,
+        type=float,
+    )
+    parser.add_argument(
+        "--min_success_drop",
+        help="Smallest success rate drop, in percentage points, that counts as a regression",
+        default=5.0,
+        type=float,
+    )
+    parser.add_argument("--min_samples", help="Fewest successful runs needed for a latency test", default=5, type=int)
+    args = parser.parse_args()
+
+    report = compare(load_runs(args.baseline, args.store), load_runs(args.candidate, args.store), args.min_samples)
+    if report.empty:
+        raise SystemExit("The baseline and candidate have no benchmark/implementation in common")
+    report["adjusted_p_value"] = holm(report["p_value"].tolist())
+    practical = ((report["metric"] == "latency") & (report["change"] > args.min_slowdown)) | (
+        (report["metric"] == "success_rate") & (-report["change"] > args.min_success_drop)
+    )
+    report["regression"] = (report["adjusted_p_value"] < args.alpha) & practical
+
+    for row in report.itertuples(index=False):
+        unit = "s" if row.metric == "latency" else "%"
+        change = f"{row.change * 100:+.1f}%" if row.metric == "latency" else f"{row.change:+.1f} pts"
+        logging.log(
+            logging.ERROR if row.regression else logging.INFO,
+            f"{'FAIL' if row.regression else 'pass'} {row.benchmark}-{row.implementation} {row.metric}: "
+            f"{row.baseline:.2f}{unit} -> {row.candidate:.2f}{unit} ({change}), "
+            f"effect {row.effect_size:+.2f}, adjusted p={row.adjusted_p_value:.4f}",
+        )
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_csv = f"regression_report_{timestamp}.csv"
+    report.to_csv(output_csv, index=False)
+    logging.info(f"Report saved to: {output_csv}")
+
+    regressions = int(report["regression"].sum())
+    if regressions:
+        logging.error(f"{regressions} significant regression(s) in {args.candidate} against {args.baseline}")
+        sys.exit(1)
+    logging.info(f"No significant regressions in {args.candidate} against {args.baseline}")
@@ -0,0 +1,202 @@
+"""Keep every benchmark sweep in one Parquet store and report across sweeps.
+
+``ingest`` appends ``benchmark_detailed_results_*.csv`` files (one row per run,
+as written by overall_accuracy.py) to a Hive-partitioned Parquet dataset laid
+out as ``date=YYYY-MM-DD/benchmark=.../implementation=...``. Each file is
+tagged with its sweep id (the timestamp in its name), and re-ingesting a sweep
+overwrites its own files, so it is safe to run on a directory of CSVs again.
+Only whole sweeps are stored: the per-shard and per-worker parts of a split
+sweep (``..._<sweep>_shard1of4.csv``, ``..._<sweep>_<host>-<pid>.csv``) are
+skipped, and the file ``overall_accuracy.py --merge`` writes for them is
+ingested instead, so every run is stored exactly once.
+
+``report`` reads the store with partition filters and aggregates per
+benchmark, implementation and sweep (or date) in pandas: runs, success rate
+and mean/median/p95 latency. It writes the table to CSV and renders the charts
+headlessly (latency and success rate per benchmark, latency across sweeps).
+"""
+
+import argparse
+import glob
+import logging
+import os
+import re
+from datetime import datetime
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("date", pa.string()), ("benchmark", pa.string()), ("implementation", pa.string())]),
+    flavor="hive",
+)
+COLUMN_TYPES = {
+    "file_path": "string", "run_number": "Int64", "file_exists": "boolean", "success": "boolean",
+    "execution_time": "float64", "return_code": "Int64", "command": "string", "stdout": "string",
+    "stderr": "string", "llm_calls": "Int64", "prompt_tokens": "Int64", "completion_tokens": "Int64",
+    "cached_tokens": "Int64", "llm_time": "float64", "timestamp": "string",
+}
+
+
+def sweep_id(csv_path):
+    """The ``YYYYmmdd_HHMMSS`` stamp in a results file name, or the file name itself."""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    match = re.search(r"\d{8}_\d{6}", name)
+    return match.group(0) if match else re.sub(r"\W+", "_", name)
+
+
+def is_sweep_part(csv_path):
+    """Whether ``csv_path`` is one shard's or worker's part of a sweep rather than the whole sweep."""
+    return re.fullmatch(r"benchmark_detailed_results_\d{8}_\d{6}_.+\.csv", os.path.basename(csv_path)) is not None
+
+
+def load_csv(csv_path):
+    """Read one detailed results CSV into a frame with stable column types."""
+    frame = pd.read_csv(csv_path, true_values=["True", "TRUE"], false_values=["False", "FALSE"])
+    frame = frame.loc[:, ~frame.columns.str.startswith("Unnamed")]
+    frame = frame.dropna(subset=["benchmark", "implementation"])
+    for column, dtype in COLUMN_TYPES.items():
+        if column in frame:
+            frame[column] = frame[column].astype(dtype)
+    frame["sweep"] = sweep_id(csv_path)
+    frame["date"] = pd.to_datetime(frame["timestamp"], errors="coerce").dt.strftime("%Y-%m-%d").fillna("unknown")
+    return frame
+
+
+def ingest(csv_paths, store):
+    total = 0
+    parts = [csv_path for csv_path in csv_paths if is_sweep_part(csv_path)]
+    for csv_path in parts:
+        logging.warning(
+            f"Skipping {csv_path}: it is part of sweep {sweep_id(csv_path)}; "
+            "ingest the file overall_accuracy.py --merge writes for the sweep instead"
+        )
+    csv_paths = [csv_path for csv_path in csv_paths if csv_path not in parts]
+    for csv_path in csv_paths:
+        frame = load_csv(csv_path)
+        sweep = frame["sweep"].iloc[0] if len(frame) else sweep_id(csv_path)
+        ds.write_dataset(
+            pa.Table.from_pandas(frame, preserve_index=False),
+            store,
+            format="parquet",
+            partitioning=PARTITIONING,
+            basename_template=f"{sweep}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        total += len(frame)
+        logging.info(f"Ingested {len(frame)} runs from {csv_path} as sweep {sweep}")
+    logging.info(f"{total} runs from {len(csv_paths)} files stored in {store}")
+
+
+def read_store(store, benchmarks=None, implementations=None, since=None, until=None):
+    """Load the runs matching the filters; partition filters skip non-matching files entirely."""
+    dataset = ds.dataset(store, format="parquet", partitioning=PARTITIONING)
+    schema = pa.unify_schemas(
+        [fragment.physical_schema for fragment in dataset.get_fragments()] + [PARTITIONING.schema]
+    )
+    dataset = ds.dataset(store, format="parquet", partitioning=PARTITIONING, schema=schema)
+
+    conditions = []
+    if benchmarks:
+        conditions.append(ds.field("benchmark").isin(benchmarks))
+    if implementations:
+        conditions.append(ds.field("implementation").isin(implementations))
+    if since:
+        conditions.append(ds.field("date") >= since)
+    if until:
+        conditions.append(ds.field("date") <= until)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    columns = [c for c in ["benchmark", "implementation", "date", "sweep", "success", "execution_time",
+                           "llm_calls", "prompt_tokens"] if c in schema.names]
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def aggregate(runs, by):
+    """Runs, success rate and latency statistics per benchmark, implementation and ``by``."""
+    runs = runs.dropna(subset=["success"])
+    latency = runs["execution_time"].where(runs["success"].astype(bool))
+    grouped = runs.assign(latency=latency).groupby(["benchmark", "implementation", by], observed=True)
+    report = grouped.agg(
+        runs=("success", "size"),
+        successful_runs=("success", "sum"),
+        avg_execution_time=("latency", "mean"),
+        median_execution_time=("latency", "median"),
+        p95_execution_time=("latency", lambda x: x.quantile(0.95)),
+    ).reset_index()
+    report["success_rate"] = report["successful_runs"] / report["runs"] * 100
+    return report
+
+
+def plot_report(report, by, output_png):
+    """Latency and success rate per benchmark (latest ``by`` value), plus latency across sweeps."""
+    latest = report.sort_values(by).groupby(["benchmark", "implementation"], observed=True).tail(1)
+    fig, axes = plt.subplots(3, 1, figsize=(14, 15))
+
+    latest.pivot(index="benchmark", columns="implementation", values="median_execution_time").plot.bar(ax=axes[0])
+    axes[0].set_ylabel("Median execution time (s)")
+    axes[0].set_title("Latency per benchmark (latest run)", fontweight="bold")
+
+    latest.pivot(index="benchmark", columns="implementation", values="success_rate").plot.bar(ax=axes[1])
+    axes[1].set_ylabel("Success rate (%)")
+    axes[1].set_title("Success rate per benchmark (latest run)", fontweight="bold")
+
+    trend = report.groupby([by, "implementation"], observed=True)["median_execution_time"].mean().unstack()
+    trend.plot(ax=axes[2], marker="o")
+    axes[2].set_xlabel(by)
+    axes[2].set_ylabel("Mean of benchmark medians (s)")
+    axes[2].set_title(f"Latency across {by}s", fontweight="bold")
+
+    for ax in axes:
+        ax.grid(alpha=0.3)
+        ax.legend(title="Framework")
+    fig.tight_layout()
+    fig.savefig(output_png)
+    plt.close(fig)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar store and cross-run report for benchmark results")
+    parser.add_argument("--store", help="Parquet dataset directory", default="results_store", type=str)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Append detailed results CSVs to the store")
+    ingest_parser.add_argument(
+        "csv_files",
+        help="Detailed results CSVs (default: benchmark_detailed_results_*.csv)",
+        nargs="*",
+    )
+
+    report_parser = subparsers.add_parser("report", help="Compare latency and success across runs")
+    report_parser.add_argument("--benchmarks", help="Benchmarks to include", default=None, nargs="+")
+    report_parser.add_argument("--impl", help="Implementations to include", default=None, nargs="+")
+    report_parser.add_argument("--since", help="First date to include (YYYY-MM-DD)", default=None, type=str)
+    report_parser.add_argument("--until", help="Last date to include (YYYY-MM-DD)", default=None, type=str)
+    report_parser.add_argument("--by", help="Group runs by sweep or by date", default="sweep", choices=["sweep", "date"])
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        ingest(args.csv_files or sorted(glob.glob("benchmark_detailed_results_*.csv")), args.store)
+    else:
+        runs = read_store(args.store, args.benchmarks, args.impl, args.since, args.until)
+        if runs.empty:
+            raise SystemExit(f"No runs in {args.store} match the filters")
+        report = aggregate(runs, args.by)
+        logging.info(f"{len(runs)} runs across {runs[args.by].nunique()} {args.by}s\n{report.to_string(index=False)}")
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_csv = f"results_report_{timestamp}.csv"
+        output_png = f"results_report_{timestamp}.png"
+        report.to_csv(output_csv, index=False)
+        plot_report(report, args.by, output_png)
+        logging.info(f"Report saved to: {output_csv}")
+        logging.info(f"Charts saved to: {output_png}")
@@ -0,0 +1,98 @@
+"""Measure what a single invalid field costs a ``by llm()`` call.
+
+Runs a benchmark program against the stub server twice: once with rules that
+always answer correctly and once with rules whose first answer has one bad
+field (``stub_rules/text_to_type_retry.json`` breaks ``Person.age``). The
+difference in requests, tokens and wall time per run is the cost of the
+runtime's recovery path, i.e. what field-level repair is meant to reduce.
+"""
+
+import argparse
+import csv
+import logging
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+from llm_stub_server import LLMStubServer, client_env, load_rules
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def run_program(program, rules_path, num_runs):
+    """Run ``program`` ``num_runs`` times against a stub serving ``rules_path``."""
+    server = LLMStubServer(rules=load_rules(rules_path)).start()
+    runs = []
+    try:
+        for run_num in range(1, num_runs + 1):
+            start_time = time.time()
+            result = subprocess.run(
+                ["jac", "run", program],
+                capture_output=True,
+                text=True,
+                env=client_env(server.base_url),
+                timeout=300,
+            )
+            requests = server.drain()
+            runs.append({
+                "rules": rules_path,
+                "run_number": run_num,
+                "success": result.returncode == 0,
+                "execution_time": time.time() - start_time,
+                "requests": len(requests),
+                "prompt_tokens": sum(r["prompt_tokens"] for r in requests),
+                "completion_tokens": sum(r["completion_tokens"] for r in requests),
+            })
+    finally:
+        server.stop()
+    return runs
+
+
+def mean_of(runs, key):
+    return statistics.mean(run[key] for run in runs) if runs else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cost of recovering from an invalid LLM output")
+    parser.add_argument(
+        "--program",
+        help="Jac program to run",
+        default="../benchmarks/text_to_type/text_to_type_mtllm.jac",
+        type=str,
+    )
+    parser.add_argument(
+        "--baseline_rules",
+        help="Stub rules that always return a valid output",
+        default="stub_rules/text_to_type.json",
+        type=str,
+    )
+    parser.add_argument(
+        "--rules",
+        help="Stub rules whose first output has an invalid field",
+        default="stub_rules/text_to_type_retry.json",
+        type=str,
+    )
+    parser.add_argument("--runs", help="Runs per rule set", default=10, type=int)
+    args = parser.parse_args()
+
+    baseline = run_program(args.program, args.baseline_rules, args.runs)
+    faulty = run_program(args.program, args.rules, args.runs)
+
+    for key in ["requests", "prompt_tokens", "completion_tokens", "execution_time"]:
+        logging.info(
+            f"{key}: {mean_of(baseline, key):.2f} valid vs {mean_of(faulty, key):.2f} with one bad field "
+            f"(+{mean_of(faulty, key) - mean_of(baseline, key):.2f} per run)"
+        )
+    logging.info(
+        f"Success: {sum(r['success'] for r in baseline)}/{len(baseline)} valid, "
+        f"{sum(r['success'] for r in faulty)}/{len(faulty)} with one bad field"
+    )
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_csv = f"retry_cost_results_{timestamp}.csv"
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(baseline[0].keys()))
+        writer.writeheader()
+        writer.writerows(baseline + faulty)
+    logging.info(f"Results saved to: {output_csv}")
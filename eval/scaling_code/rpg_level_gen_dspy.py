@@ -0,0 +1,91 @@
+import os
+from typing import List
+
+import dspy
+from pydantic import BaseModel, Field
+
+llm = dspy.LM('openai/gpt-4o', cache=False, )
+dspy.settings.configure(lm=llm)
+n = int(os.environ.get("SCALE_N", "10"))
+
+
+class Position(BaseModel):
+    x: int = Field(description="X Coordinate")
+    y: int = Field(description="Y Coordinate")
+
+
+class Wall(BaseModel):
+    start_pos: Position = Field(description="Start Position of the Wall")
+    end_pos: Position = Field(description="End Position of the Wall")
+
+
+class Level(BaseModel):
+    name: str = Field(description="Name of the Level")
+    difficulty: int = Field(description="Difficulty of the Level")
+    width: int = Field(description="Width of the Map")
+    height: int = Field(description="Height of the Map")
+    num_wall: int = Field(description="Number of Walls in the Map")
+    num_enemies: int = Field(description="Number of Enemies in the Map")
+    time_countdown: int = Field(description="Time Countdown of the Level")
+    n_retries_allowed: int = Field(description="Number of Retries Allowed")
+
+
+class Map(BaseModel):
+    level: Level = Field(description="Level of the Map")
+    walls: list[Wall] = Field(description="Walls in the Map Other than Edges")
+    small_obstacles: List[Position] = Field(description="Obstacles in the Map")
+    enemies: list[Position] = Field(description="Enemies in the Map")
+    player_pos: Position = Field(description="Player Position in the Map")
+
+
+class CreateNextLevel(dspy.Signature):
+    """Create Next Level"""
+
+    last_levels: list[Level] = dspy.InputField(desc="Last Played Levels")
+    difficulty: int = dspy.InputField(desc="Difficulty of the New Level")
+    level_width: int = dspy.InputField(desc="Width of the Level")
+    level_height: int = dspy.InputField(desc="Height of the Level")
+    next_level: Level = dspy.OutputField(desc="Next Level")
+
+
+class CreateMap(dspy.Signature):
+    """Create Map for the Level"""
+
+    level: Level = dspy.InputField(desc="Level")
+    map: Map = dspy.OutputField(desc="Map")
+
+
+class LevelManager:
+    current_level: int = 0
+    current_difficulty: int = 1
+    prev_levels: List[Level] = []
+    prev_level_maps: List[Map] = []
+
+    def get_next_level(self) -> tuple[Level, Map]:
+        """Get the Next Level"""
+        self.current_level += 1
+
+        # Keeping the whole history so the prompt grows with SCALE_N
+        new_level = dspy.TypedPredictor(CreateNextLevel)(
+            last_levels=self.prev_levels,
+            difficulty=self.current_difficulty,
+            level_width=20,
+            level_height=20,
+        ).next_level
+        self.prev_levels.append(new_level)
+
+        new_level_map = dspy.TypedPredictor(CreateMap)(level=new_level).map
+        self.prev_level_maps.append(new_level_map)
+
+        return new_level, new_level_map
+
+
+level_manager = LevelManager()
+level_manager.prev_levels = [
+    Level(name=f"Level {i}", difficulty=1 + i // 2, width=20, height=20, num_wall=3,
+          num_enemies=2, time_countdown=120, n_retries_allowed=3)
+    for i in range(n)
+]
+new_level, new_level_map = level_manager.get_next_level()
+print(new_level)
+print(len(new_level_map.walls))
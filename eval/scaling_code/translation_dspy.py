@@ -0,0 +1,42 @@
+import os
+
+import dspy
+from dspy.teleprompt import BootstrapFewShot
+
+llm = dspy.LM('openai/gpt-4o', cache=False, )
+dspy.settings.configure(lm=llm)
+n = int(os.environ.get("SCALE_N", "10"))
+
+examples: dict[str, str] = {f"english word {i}": f"mot français {i}" for i in range(n)}
+
+dataset = [
+    dspy.Example(english_word=english_word, translation=translation).with_inputs(
+        "english_word"
+    )
+    for english_word, translation in examples.items()
+]
+
+
+class Translation(dspy.Signature):
+    """Translate the given English word"""
+
+    english_word: str = dspy.InputField(desc="English word to translate")
+    translation: str = dspy.OutputField(desc="Translation")
+
+
+class TranslationModule(dspy.Module):
+    def __init__(self):
+        super().__init__()
+        self.generate_answer = dspy.Predict(Translation)
+
+    def forward(self, english_word: str):
+        prediction = self.generate_answer(english_word=english_word)
+        return dspy.Prediction(translation=prediction.translation)
+
+
+# Use all N examples as demos, like incl_info in the MTLLM version (the defaults cap them at 16 labeled + 4 bootstrapped)
+translate = BootstrapFewShot(max_bootstrapped_demos=0, max_labeled_demos=n).compile(
+    TranslationModule(), trainset=dataset
+)
+pred = translate(english_word="cheese")
+print(pred.translation)
@@ -0,0 +1,215 @@
+"""Scaling benchmarks: how each framework behaves as the input size N grows.
+
+Runs the parametric programs in ``scaling_code/`` against the stub server for
+a range of sizes (``SCALE_N``):
+
+- taskman: N task strings, one ``Task`` call each
+- rpg_level_gen: N previous levels passed back in, and a generated map with N walls
+- translation: N examples in the ``incl_info`` dict / as N labeled few-shot demos
+
+For every (workload, implementation, N) it records wall time, LLM calls,
+throughput (calls/s), mean time per call, prompt tokens and peak RSS. It then
+writes a CSV and one chart per workload with these curves against N.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import re
+from datetime import datetime
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from connection_reuse import run_with_rusage
+from llm_stub_server import LLMStubServer, client_env, program_command, program_file
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+LEVEL = {
+    "name": "Stub Level", "difficulty": 1, "width": 20, "height": 20, "num_wall": 3,
+    "num_enemies": 2, "time_countdown": 120, "n_retries_allowed": 3,
+}
+
+
+def rule(name, pattern, response):
+    return (name, re.compile(pattern, re.DOTALL), response)
+
+
+def dspy_response(field, value):
+    """Format ``value`` the way DSPy's ChatAdapter expects an output field."""
+    return f"[[ ## {field} ## ]]\n{value}\n\n[[ ## completed ## ]]"
+
+
+def jac_level():
+    return "Level(" + ", ".join(f"{key}={json.dumps(value)}" for key, value in LEVEL.items()) + ")"
+
+
+def jac_position(position):
+    return f"Position(x={position['x']}, y={position['y']})"
+
+
+def map_data(n):
+    """A map of the stub level with ``n`` walls, as plain data."""
+    positions = [{"x": i % 20 + 1, "y": i // 20 % 20 + 1} for i in range(n + 1)]
+    return {
+        "level": LEVEL,
+        "walls": [{"start_pos": positions[i], "end_pos": positions[i + 1]} for i in range(n)],
+        "small_obstacles": positions[: max(1, n // 4)],
+        "enemies": positions[: max(1, n // 8)],
+        "player_pos": {"x": 1, "y": 1},
+    }
+
+
+def jac_map(data):
+    walls = ", ".join(
+        f"Wall(start_pos={jac_position(w['start_pos'])}, end_pos={jac_position(w['end_pos'])})"
+        for w in data["walls"]
+    )
+    obstacles = ", ".join(jac_position(p) for p in data["small_obstacles"])
+    enemies = ", ".join(jac_position(p) for p in data["enemies"])
+    return (
+        f"Map(level={jac_level()}, walls=[{walls}], small_obstacles=[{obstacles}], "
+        f"enemies=[{enemies}], player_pos={jac_position(data['player_pos'])})"
+    )
+
+
+def taskman_rules(n):
+    task = {"description": "Work on the project backlog", "time": 30, "priority": 5}
+    return [
+        rule("task", r"\[\[ ## task ## \]\]", dspy_response("task", json.dumps(task))),
+        rule(
+            "task",
+            r"Task",
+            '[Reasoning] The item is routine work.\n'
+            '[Output] Task(description="Work on the project backlog", time_in_min=30, priority_out_of_10=5)',
+        ),
+    ]
+
+
+def rpg_level_gen_rules(n):
+    data = map_data(n)
+    return [
+        rule("create_next_map", r"\[\[ ## map ## \]\]", dspy_response("map", json.dumps(data))),
+        rule("create_next_level", r"\[\[ ## next_level ## \]\]", dspy_response("next_level", json.dumps(LEVEL))),
+        rule("create_next_map", r"create_next_map", f"[Output] {jac_map(data)}"),
+        rule("create_next_level", r"create_next_level", f"[Output] {jac_level()}"),
+    ]
+
+
+def translation_rules(n):
+    return [
+        rule("translate", r"\[\[ ## translation ## \]\]", dspy_response("translation", "fromage")),
+        rule("translate", r"translate", '[Output] "fromage"'),
+    ]
+
+
+WORKLOADS = {
+    "taskman": (taskman_rules, [10, 100, 1000, 10000]),
+    "rpg_level_gen": (rpg_level_gen_rules, [1, 10, 100, 1000]),
+    "translation": (translation_rules, [10, 100, 1000, 10000]),
+}
+
+
+def plot_workload(workload, rows, output_png):
+    """Plot time, throughput, per-call latency and memory against N for every implementation."""
+    metrics = [
+        ("execution_time", "Execution time (s)"),
+        ("calls_per_second", "Throughput (LLM calls/s)"),
+        ("time_per_call", "Latency per LLM call (s)"),
+        ("max_rss_kb", "Peak RSS (KB)"),
+    ]
+    fig, axes = plt.subplots(1, len(metrics), figsize=(20, 4.5))
+    for implementation in sorted({row["implementation"] for row in rows}):
+        points = sorted((row["n"], row) for row in rows if row["implementation"] == implementation and row["success"])
+        for ax, (key, _) in zip(axes, metrics):
+            ax.plot([n for n, _ in points], [row[key] for _, row in points], marker="o", label=implementation)
+    for ax, (_, label) in zip(axes, metrics):
+        ax.set_xscale("log")
+        ax.set_xlabel("N")
+        ax.set_ylabel(label)
+        ax.grid(alpha=0.3)
+        ax.legend(title="Framework")
+    fig.suptitle(f"{workload}: scaling with input size", fontweight="bold")
+    fig.tight_layout()
+    fig.savefig(output_png)
+    plt.close(fig)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the parametric scaling benchmarks against a stub server")
+    parser.add_argument(
+        "--workloads",
+        help="Workloads to run",
+        default=list(WORKLOADS),
+        nargs="+",
+        choices=list(WORKLOADS),
+    )
+    parser.add_argument(
+        "--impl",
+        help="Implementations to run",
+        default=["mtllm", "dspy"],
+        nargs="+",
+        choices=["mtllm", "dspy"],
+    )
+    parser.add_argument(
+        "--sizes",
+        help="Override the N values for every workload",
+        default=None,
+        nargs="+",
+        type=int,
+    )
+    args = parser.parse_args()
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    rows = []
+    for workload in args.workloads:
+        make_rules, sizes = WORKLOADS[workload]
+        workload_rows = []
+        for n in args.sizes or sizes:
+            server = LLMStubServer(rules=make_rules(n)).start()
+            try:
+                for implementation in args.impl:
+                    env = client_env(server.base_url)
+                    env["SCALE_N"] = str(n)
+                    return_code, stderr, max_rss, execution_time = run_with_rusage(
+                        program_command(program_file(workload, implementation, "scaling_code")), env, timeout=600
+                    )
+                    requests = server.drain()
+                    row = {
+                        "workload": workload,
+                        "implementation": implementation,
+                        "n": n,
+                        "success": return_code == 0,
+                        "execution_time": execution_time,
+                        "llm_calls": len(requests),
+                        "calls_per_second": len(requests) / execution_time if execution_time else 0,
+                        "time_per_call": execution_time / len(requests) if requests else 0,
+                        "prompt_tokens": sum(r["prompt_tokens"] for r in requests),
+                        "max_prompt_tokens": max((r["prompt_tokens"] for r in requests), default=0),
+                        "max_rss_kb": max_rss,
+                    }
+                    workload_rows.append(row)
+                    if return_code != 0:
+                        logging.warning(f"{workload}-{implementation} N={n} failed: {stderr.strip()[-300:]}")
+                    logging.info(
+                        f"{workload}-{implementation} N={n}: {execution_time:.2f}s, {len(requests)} calls "
+                        f"({row['calls_per_second']:.1f}/s), max prompt {row['max_prompt_tokens']} tokens, "
+                        f"peak RSS {max_rss / 1024:.1f} MB"
+                    )
+            finally:
+                server.stop()
+        output_png = f"scaling_{workload}_{timestamp}.png"
+        plot_workload(workload, workload_rows, output_png)
+        logging.info(f"Chart saved to: {output_png}")
+        rows.extend(workload_rows)
+
+    output_csv = f"scaling_results_{timestamp}.csv"
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    logging.info(f"Results saved to: {output_csv}")
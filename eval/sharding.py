@@ -0,0 +1,124 @@
+"""Split a benchmark sweep across worker processes or hosts.
+
+Two ways to share the work:
+
+- ``--shard i/N``: a deterministic round-robin slice of the work list. Worker
+  ``i`` (1-based) takes items ``i-1, i-1+N, ...``, so N workers given the same
+  list cover it exactly once without talking to each other.
+- ``WorkQueue``: a SQLite file that workers claim items from one at a time,
+  which balances uneven items. All workers must see the same file (one machine,
+  or a shared filesystem with working file locks). The file also holds a sweep
+  id, so every worker names its output after the same sweep.
+
+Fixed shards cannot agree on a sweep id by themselves, so they are given one
+(``--sweep``, a ``YYYYmmdd_HHMMSS`` stamp like the one a single run uses).
+"""
+
+import argparse
+import os
+import re
+import socket
+import sqlite3
+import time
+
+
+def parse_shard(value):
+    """argparse type for ``i/N``; returns ``(i, N)``."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard index must be between 1 and {count}, got {index}")
+    return index, count
+
+
+def parse_sweep(value):
+    """argparse type for a ``YYYYmmdd_HHMMSS`` sweep id."""
+    if not re.fullmatch(r"\d{8}_\d{6}", value):
+        raise argparse.ArgumentTypeError(f"expected a YYYYmmdd_HHMMSS sweep id, got {value!r}")
+    return value
+
+
+def file_sweep(path):
+    """The sweep id in a results file name, or None when it has none."""
+    match = re.search(r"\d{8}_\d{6}", os.path.basename(path))
+    return match.group(0) if match else None
+
+
+def shard_items(items, shard):
+    """The slice of ``items`` that ``shard`` (as returned by parse_shard) runs."""
+    index, count = shard
+    return items[index - 1::count]
+
+
+class WorkQueue:
+    """Work items in a SQLite table, claimed by whichever worker asks next.
+
+    The first worker to open the file adds ``items`` and sets the sweep id to
+    ``sweep``; later workers add nothing new and read that id back as
+    ``self.sweep``. Iterating claims items until none are left and marks each one
+    done once the loop body finishes. If the loop stops early (an exception or
+    ``break``), the item goes back to pending for another worker. A worker that
+    dies without either (SIGKILL, a lost host) leaves its item running; once it
+    has been running for longer than ``lease`` seconds, the next claim takes it over.
+    """
+
+    def __init__(self, path, items, worker=None, timeout=60, lease=7200, sweep=None):
+        self.worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease = lease
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS work (item TEXT PRIMARY KEY, position INTEGER, "
+            "status TEXT NOT NULL DEFAULT 'pending', worker TEXT, started_at REAL, finished_at REAL)"
+        )
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute("BEGIN IMMEDIATE")
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO work (item, position) VALUES (?, ?)",
+            [(item, position) for position, item in enumerate(items)],
+        )
+        self.connection.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES ('sweep', ?)",
+            (sweep or time.strftime("%Y%m%d_%H%M%S"),),
+        )
+        self.sweep = self.connection.execute("SELECT value FROM meta WHERE key = 'sweep'").fetchone()[0]
+        self.connection.execute("COMMIT")
+
+    def claim(self):
+        """Mark the next pending (or expired running) item as ours and return it, or None when nothing is left."""
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        # 'pending' sorts before 'running', so untouched items go out before expired ones
+        row = self.connection.execute(
+            "SELECT item FROM work WHERE status = 'pending' OR (status = 'running' AND started_at < ?) "
+            "ORDER BY status, position LIMIT 1",
+            (now - self.lease,),
+        ).fetchone()
+        if row:
+            self.connection.execute(
+                "UPDATE work SET status = 'running', worker = ?, started_at = ? WHERE item = ?",
+                (self.worker, now, row[0]),
+            )
+        self.connection.execute("COMMIT")
+        return row[0] if row else None
+
+    def finish(self, item, status="done"):
+        # Only while we still hold the item: another worker may have taken it over after our lease ran out
+        self.connection.execute(
+            "UPDATE work SET status = ?, finished_at = ? WHERE item = ? AND worker = ?",
+            (status, time.time(), item, self.worker),
+        )
+
+    def __iter__(self):
+        while (item := self.claim()) is not None:
+            try:
+                yield item
+            except BaseException:
+                self.finish(item, "pending")
+                raise
+            self.finish(item)
+
+    def progress(self):
+        """Item counts per status, e.g. ``{"done": 12, "running": 3, "pending": 24}``."""
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM work GROUP BY status").fetchall())
@@ -0,0 +1,131 @@
+"""Measure start-up cost: time from process launch to the first prompt sent.
+
+Each benchmark is launched against the stub server and stopped as soon as its
+first completion request arrives, so only interpreter start-up, imports,
+program compilation and client construction are timed. The heavy imports
+behind each framework are also timed on their own (``python -c "import X"``
+minus a bare interpreter) to show where that time goes.
+"""
+
+import argparse
+import csv
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from llm_stub_server import LLMStubServer, client_env, program_command, program_file
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+IMPORTS = ["jaclang", "mtllm.llms", "openai", "pydantic", "litellm", "dspy"]
+
+
+def time_to_first_request(cmd, server, timeout=120):
+    """Launch ``cmd`` and return seconds until its first LLM request (None if it never sent one)."""
+    server.drain()
+    launched_at = time.time()
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=client_env(server.base_url),
+    )
+    try:
+        while server.request_count() == 0 and process.poll() is None:
+            if time.time() - launched_at > timeout:
+                break
+            time.sleep(0.005)
+    finally:
+        process.kill()
+        process.wait()
+    requests = server.drain()
+    if not requests:
+        return None
+    return min(request["received_at"] for request in requests) - launched_at
+
+
+def import_time(module, runs):
+    """Median seconds ``import module`` adds to a bare interpreter start."""
+    def median_run(code):
+        times = []
+        for _ in range(runs):
+            start_time = time.perf_counter()
+            result = subprocess.run([sys.executable, "-c", code], capture_output=True)
+            times.append(time.perf_counter() - start_time)
+            if result.returncode != 0:
+                return None
+        return statistics.median(times)
+
+    bare = median_run("pass")
+    loaded = median_run(f"import {module}")
+    return loaded - bare if loaded is not None else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure time from launch to the first prompt sent")
+    parser.add_argument(
+        "--benchmarks",
+        help="Benchmarks to run (default: all in ../benchmarks)",
+        default=None,
+        nargs="+",
+    )
+    parser.add_argument(
+        "--impl",
+        help="Implementations to run",
+        default=["mtllm", "dspy"],
+        nargs="+",
+        choices=["mtllm", "dspy"],
+    )
+    parser.add_argument("--runs", help="Launches per benchmark", default=5, type=int)
+    args = parser.parse_args()
+
+    benchmarks = args.benchmarks or sorted(
+        b for b in os.listdir("../benchmarks") if os.path.isdir(os.path.join("../benchmarks", b)) and b != "template"
+    )
+    rows = []
+
+    for module in IMPORTS:
+        seconds = import_time(module, args.runs)
+        if seconds is None:
+            logging.warning(f"import {module}: not installed")
+            continue
+        logging.info(f"import {module}: {seconds:.3f}s")
+        rows.append({"kind": "import", "name": module, "implementation": "", "runs": args.runs,
+                     "median_seconds": seconds, "min_seconds": "", "max_seconds": ""})
+
+    server = LLMStubServer().start()
+    try:
+        for benchmark in benchmarks:
+            for implementation in args.impl:
+                times = []
+                for _ in range(args.runs):
+                    seconds = time_to_first_request(program_command(program_file(benchmark, implementation)), server)
+                    if seconds is not None:
+                        times.append(seconds)
+                if not times:
+                    logging.warning(f"{benchmark}-{implementation}: no request reached the stub server")
+                    continue
+                logging.info(
+                    f"{benchmark}-{implementation}: first prompt after {statistics.median(times):.3f}s "
+                    f"(min {min(times):.3f}s, max {max(times):.3f}s)"
+                )
+                rows.append({"kind": "first_request", "name": benchmark, "implementation": implementation,
+                             "runs": len(times), "median_seconds": statistics.median(times),
+                             "min_seconds": min(times), "max_seconds": max(times)})
+    finally:
+        server.stop()
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_csv = f"startup_results_{timestamp}.csv"
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(
+            f,
+            fieldnames=["kind", "name", "implementation", "runs", "median_seconds", "min_seconds", "max_seconds"],
+        )
+        writer.writeheader()
+        writer.writerows(rows)
+    logging.info(f"Results saved to: {output_csv}")
@@ -0,0 +1,102 @@
+"""Measure how each framework behaves when the provider starts throttling.
+
+Runs several copies of a benchmark concurrently against the stub server, first
+without throttling and then with injected HTTP 429 responses. For each
+implementation it reports successful runs, total requests and throttled
+requests. ``amplification`` is the number of requests per successful run
+relative to the unthrottled baseline. It shows how much retry traffic a 429
+storm adds and is the figure a client-side concurrency limiter should bring
+back to 1.
+"""
+
+import argparse
+import csv
+import logging
+import subprocess
+import time
+from datetime import datetime
+
+from llm_stub_server import LLMStubServer, client_env, load_rules, program_command, program_file
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def run_concurrently(cmd, workers, server):
+    """Start ``workers`` copies of ``cmd`` at once and return ``(successes, requests, seconds)``."""
+    start_time = time.time()
+    processes = [
+        subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=client_env(server.base_url),
+        )
+        for _ in range(workers)
+    ]
+    successes = sum(1 for process in processes if process.wait(timeout=600) == 0)
+    return successes, server.drain(), time.time() - start_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure retry amplification under provider throttling")
+    parser.add_argument("--benchmark", help="Benchmark to run", default="text_to_type", type=str)
+    parser.add_argument(
+        "--impl",
+        help="Implementations to run",
+        default=["mtllm", "dspy"],
+        nargs="+",
+        choices=["mtllm", "dspy"],
+    )
+    parser.add_argument(
+        "--rules",
+        help="Stub server response rules (defaults to stub_rules/<benchmark>.json)",
+        default=None,
+        type=str,
+    )
+    parser.add_argument("--workers", help="Concurrent copies of the benchmark", default=8, type=int)
+    parser.add_argument("--throttle_rate", help="Probability of a 429 response", default=0.3, type=float)
+    parser.add_argument("--rpm_limit", help="Accepted requests per minute before 429s", default=0, type=int)
+    args = parser.parse_args()
+
+    rules = load_rules(args.rules or f"stub_rules/{args.benchmark}.json")
+    rows = []
+    for implementation in args.impl:
+        cmd = program_command(program_file(args.benchmark, implementation))
+        baseline_requests_per_run = None
+        for throttle_rate, rpm_limit in [(0.0, 0), (args.throttle_rate, args.rpm_limit)]:
+            server = LLMStubServer(rules=rules, throttle_rate=throttle_rate, rpm_limit=rpm_limit).start()
+            try:
+                successes, requests, execution_time = run_concurrently(cmd, args.workers, server)
+            finally:
+                server.stop()
+            requests_per_run = len(requests) / successes if successes else float("inf")
+            if baseline_requests_per_run is None:
+                baseline_requests_per_run = requests_per_run
+            row = {
+                "benchmark": args.benchmark,
+                "implementation": implementation,
+                "workers": args.workers,
+                "throttle_rate": throttle_rate,
+                "rpm_limit": rpm_limit,
+                "successful_runs": successes,
+                "requests": len(requests),
+                "throttled_requests": sum(1 for r in requests if r["status"] == 429),
+                "requests_per_successful_run": requests_per_run,
+                "amplification": requests_per_run / baseline_requests_per_run if baseline_requests_per_run else 0,
+                "execution_time": execution_time,
+            }
+            rows.append(row)
+            logging.info(
+                f"{implementation} (throttle {throttle_rate}, rpm {rpm_limit}): "
+                f"{successes}/{args.workers} runs succeeded, {row['requests']} requests "
+                f"({row['throttled_requests']} throttled), amplification {row['amplification']:.2f}x, "
+                f"{execution_time:.2f}s"
+            )
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_csv = f"throttle_results_{timestamp}.csv"
+    with open(output_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    logging.info(f"Results saved to: {output_csv}")